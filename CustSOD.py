@@ -2,12 +2,21 @@
 # Flask-compatible module for customers to view their order delivery status
 
 import sqlite3
-import csv
 import os
 from datetime import datetime
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
+import cache
+import db
+import monthrep
+
+# Customer statistics are cached per customer for this many seconds, for at most this many customers
+STATS_CACHE_TTL = 300
+STATS_CACHE_SIZE = 1024
+
+_stats_cache = cache.TTLCache(STATS_CACHE_SIZE, STATS_CACHE_TTL)
+
+# Every status an order can have, in lifecycle order
+ORDER_STATUSES = ('Order Placed', 'Order Picked', 'In Process', 'Out for Delivery', 'Delivered', 'Cancelled')
 
 
 def get_customer_orders(customer_id=None, month=None, year=None):
@@ -17,54 +26,56 @@ def get_customer_orders(customer_id=None, month=None, year=None):
 
     Args:
         customer_id (str): The customer ID to filter by
-        month (int): Month number (1-12). If None, returns all orders.
-        year (int): Year number. If None, uses current year.
+        month (int): Month number (1-12). If None, returns all orders of the year.
+        year (int): Year number. If None, uses current year when a month is given;
+                    if month and year are both None, returns all orders.
 
     Returns:
         list: List of dictionaries containing order information
     """
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
     try:
-        # Import cart module to ensure all tables are initialized
-        import Manipulation_of_cart_edited
-        Manipulation_of_cart_edited.init_cart_database()
+        # Filter on the indexed (customer_id, delivery_date_iso) range for the selected period
+        conditions = 'customer_id = ?'
+        params = [customer_id]
 
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        period = monthrep.get_period_bounds(month, year)
+        if period:
+            conditions += ' AND delivery_date_iso >= ? AND delivery_date_iso < ?'
+            params.extend(period)
 
-        # Simple query to get all orders for customer
-        query = '''
+        cursor.execute(f'''
             SELECT bill_id, customer_id, customer_name, order_pickup_date,
                    order_delivery_date, bill_amount, delivery_status
             FROM orders
-            WHERE customer_id = ?
-            ORDER BY order_delivery_date DESC
-        '''
-
-        cursor.execute(query, (customer_id,))
+            WHERE {conditions}
+            ORDER BY delivery_date_iso DESC
+        ''', params)
         rows = cursor.fetchall()
 
+        # Get the items of all these orders in one query instead of one query per order
+        cursor.execute(f'''
+            SELECT bill_id, item_name, quantity, unit_price, total_price
+            FROM order_items
+            WHERE bill_id IN (SELECT bill_id FROM orders WHERE {conditions})
+            ORDER BY bill_id, item_name
+        ''', params)
+
+        items_by_bill = {}
+        for item_row in cursor.fetchall():
+            items_by_bill.setdefault(item_row['bill_id'], []).append({
+                'item_name': item_row['item_name'],
+                'quantity': item_row['quantity'],
+                'unit_price': item_row['unit_price'],
+                'total_price': item_row['total_price']
+            })
+
         orders = []
         for row in rows:
-            bill_id = row['bill_id']
-
-            # Get items for this order
-            try:
-                cursor.execute('''
-                    SELECT item_name, quantity, unit_price, total_price
-                    FROM order_items
-                    WHERE bill_id = ?
-                    ORDER BY item_name
-                ''', (bill_id,))
-
-                items_rows = cursor.fetchall()
-                # Convert sqlite3.Row objects to dictionaries
-                items = [dict(row) for row in items_rows]
-                items_details = ', '.join([f"{item['quantity']}x {item['item_name']}" for item in items]) if items else 'No items'
-            except Exception as e:
-                print(f"Error getting items for {bill_id}: {e}")
-                items = []
-                items_details = 'No items'
+            items = items_by_bill.get(row['bill_id'], [])
+            items_details = ', '.join([f"{item['quantity']}x {item['item_name']}" for item in items]) if items else 'No items'
 
             orders.append({
                 'bill_id': row['bill_id'],
@@ -78,10 +89,11 @@ def get_customer_orders(customer_id=None, month=None, year=None):
                 'items': items
             })
 
-        conn.close()
+        db.release_connection(conn)
         return orders
 
     except Exception as e:
+        db.release_connection(conn)
         print(f"Error in get_customer_orders: {e}")
         return []
 
@@ -97,12 +109,7 @@ def get_order_details_for_customer(bill_id, customer_id):
     Returns:
         dict: Dictionary containing order details or None if not found/not authorized
     """
-    # Import monthrep to ensure database is initialized
-    import Manipulation_of_cart_edited
-    Manipulation_of_cart_edited.init_cart_database()
-
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -116,28 +123,23 @@ def get_order_details_for_customer(bill_id, customer_id):
 
         row = cursor.fetchone()
         if not row:
-            conn.close()
+            db.release_connection(conn)
             return None
 
-        # Get items for this order using a separate connection
-        conn2 = sqlite3.connect(DB_FILE)
-        conn2.row_factory = sqlite3.Row
-        cursor2 = conn2.cursor()
-        cursor2.execute('''
+        # Get items for this order on the same connection
+        cursor.execute('''
             SELECT item_name, quantity, unit_price, total_price
             FROM order_items
             WHERE bill_id = ?
             ORDER BY item_name
         ''', (bill_id,))
 
-        items_rows = cursor2.fetchall()
+        items_rows = cursor.fetchall()
         # Convert sqlite3.Row objects to dictionaries
         items = [dict(row) for row in items_rows]
         items_details = ', '.join([f"{item['quantity']}x {item['item_name']}" for item in items]) if items else 'No items'
 
-        cursor2.close()
-        conn2.close()
-        conn.close()
+        db.release_connection(conn)
 
         return {
             'bill_id': row['bill_id'],
@@ -154,14 +156,66 @@ def get_order_details_for_customer(bill_id, customer_id):
         }
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         print(f"Database error: {e}")
         return None
 
 
+def _empty_statistics():
+    return {
+        'total_orders': 0,
+        'delivered_orders': 0,
+        'undelivered_orders': 0,
+        'cancelled_orders': 0,
+        'total_amount': 0,
+        'status_counts': {status: 0 for status in ORDER_STATUSES}
+    }
+
+
+def _query_customer_statistics(customer_id):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # One grouped pass over the covering (customer_id, delivery_status, bill_amount) index
+        cursor.execute('''
+            SELECT delivery_status, COUNT(*) AS orders, COALESCE(SUM(bill_amount), 0) AS amount
+            FROM orders
+            WHERE customer_id = ?
+            GROUP BY delivery_status
+        ''', (customer_id,))
+        rows = cursor.fetchall()
+
+        db.release_connection(conn)
+
+    except sqlite3.Error as e:
+        db.release_connection(conn)
+        print(f"Database error: {e}")
+        return None
+
+    stats = _empty_statistics()
+    total_amount = 0
+    for row in rows:
+        stats['status_counts'][row['delivery_status']] = row['orders']
+        stats['total_orders'] += row['orders']
+        total_amount += row['amount']
+
+    counts = stats['status_counts']
+    stats['delivered_orders'] = counts.get('Delivered', 0)
+    stats['cancelled_orders'] = counts.get('Cancelled', 0)
+    # Pending: every order still on its way (neither Delivered nor Cancelled)
+    stats['undelivered_orders'] = stats['total_orders'] - stats['delivered_orders'] - stats['cancelled_orders']
+    stats['total_amount'] = round(total_amount, 2)
+    return stats
+
+
 def get_customer_statistics(customer_id):
     """
-    Get statistics for a customer including total orders, delivered orders, pending orders, etc.
+    Get statistics for a customer: total orders, delivered orders, pending
+    (undelivered) orders, cancelled orders, the count for every delivery status
+    and the total amount. Results are cached per customer until one of the
+    customer's orders changes (see invalidate_customer_statistics) or
+    STATS_CACHE_TTL seconds pass.
 
     Args:
         customer_id (str): The customer ID
@@ -169,46 +223,33 @@ def get_customer_statistics(customer_id):
     Returns:
         dict: Dictionary containing customer statistics
     """
-    # Import monthrep to ensure database is initialized
-    import Manipulation_of_cart_edited
-    Manipulation_of_cart_edited.init_cart_database()
+    stats = _stats_cache.get(customer_id)
+    if stats is None:
+        generation = _stats_cache.generation()
+        stats = _query_customer_statistics(customer_id)
+        if stats is None:
+            return _empty_statistics()
+        _stats_cache.set(customer_id, stats, generation)
 
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    return dict(stats, status_counts=dict(stats['status_counts']))
 
-    try:
-        # Get total orders
-        cursor.execute('SELECT COUNT(*) FROM orders WHERE customer_id = ?', (customer_id,))
-        total_orders = cursor.fetchone()[0]
 
-        # Get delivered orders
-        cursor.execute('SELECT COUNT(*) FROM orders WHERE customer_id = ? AND delivery_status = "Delivered"', (customer_id,))
-        delivered_orders = cursor.fetchone()[0]
-
-        # Get undelivered orders
-        cursor.execute('SELECT COUNT(*) FROM orders WHERE customer_id = ? AND delivery_status = "Undelivered"', (customer_id,))
-        undelivered_orders = cursor.fetchone()[0]
+def invalidate_customer_statistics(customer_id):
+    """
+    Drop a customer's cached statistics. Call after committing any change to
+    that customer's orders (new order, cancellation, status update).
 
-        # Get total amount spent
-        cursor.execute('SELECT SUM(bill_amount) FROM orders WHERE customer_id = ?', (customer_id,))
-        total_amount = cursor.fetchone()[0] or 0
+    Args:
+        customer_id (str): The customer ID
+    """
+    _stats_cache.invalidate(customer_id)
 
-        conn.close()
 
-        return {
-            'total_orders': total_orders,
-            'delivered_orders': delivered_orders,
-            'undelivered_orders': undelivered_orders,
-            'total_amount': total_amount
-        }
+def get_statistics_cache_stats():
+    """
+    Get hit/miss statistics for the customer statistics cache.
 
-    except sqlite3.Error as e:
-        conn.close()
-        print(f"Database error: {e}")
-        return {
-            'total_orders': 0,
-            'delivered_orders': 0,
-            'undelivered_orders': 0,
-            'total_amount': 0
-        }
\ No newline at end of file
+    Returns:
+        dict: Cache statistics
+    """
+    return _stats_cache.stats()
@@ -3,8 +3,7 @@
 
 import sqlite3
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
+import db
 
 def authenticate_customer(username, password):
     """
@@ -18,8 +17,7 @@ def authenticate_customer(username, password):
         dict: Dictionary with 'success' (bool) and 'customer_data' (dict) or 'message' (str)
               If successful, customer_data contains: cust_id, username, cust_name, mobile_no
     """
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # This allows column access by name
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -40,7 +38,7 @@ def authenticate_customer(username, password):
                 'cust_name': customer['cust_name'],
                 'mobile_no': customer['mobile_no']
             }
-            conn.close()
+            db.release_connection(conn)
             return {
                 'success': True,
                 'customer_data': customer_data,
@@ -50,20 +48,20 @@ def authenticate_customer(username, password):
             # Check if username exists but password is wrong
             cursor.execute('SELECT username FROM customers WHERE username = ?', (username,))
             if cursor.fetchone():
-                conn.close()
+                db.release_connection(conn)
                 return {
                     'success': False,
                     'message': 'Invalid password. Please check your credentials.'
                 }
             else:
-                conn.close()
+                db.release_connection(conn)
                 return {
                     'success': False,
                     'message': 'Customer not found. Please check your username.'
                 }
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {
             'success': False,
             'message': f'Database error: {str(e)}'
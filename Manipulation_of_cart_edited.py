@@ -2,14 +2,14 @@
 # Flask-compatible module for managing customer laundry carts and orders
 
 import sqlite3
-import csv
 import os
 from datetime import datetime, timedelta
 from flask import session
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
-ORDER_DETAILS_CSV = 'cust_order_details.csv'
+import CustSOD
+import db
+import delivery_slots
+import versions
 
 # Item costs
 ITEM_COSTS = {
@@ -22,47 +22,42 @@ ITEM_COSTS = {
     'T-shirt': 12
 }
 
+# GST charged on the order subtotal
+GST_RATE = 0.18
 
-def init_cart_database():
+
+# Adds a quantity to the customer's row for an item, creating the row if there is none.
+# (customer_id, item_name) is unique, so two quick clicks can never create duplicate rows.
+CART_UPSERT_SQL = '''
+    INSERT INTO cart (customer_id, item_name, quantity, unit_price, total_price)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (customer_id, item_name) DO UPDATE SET
+        quantity = cart.quantity + excluded.quantity,
+        unit_price = excluded.unit_price,
+        total_price = excluded.unit_price * (cart.quantity + excluded.quantity),
+        added_at = CURRENT_TIMESTAMP
+'''
+
+
+def _validate_cart_item(item_name, quantity):
     """
-    Initialize the SQLite database and create cart table if it doesn't exist.
+    Check an item and quantity to add to the cart.
+
+    Returns:
+        str: Error message, or None if the item can be added
     """
-    # Import monthrep to ensure orders table exists
-    import monthrep
-    monthrep.init_orders_database()
+    if item_name not in ITEM_COSTS:
+        return 'Invalid item selected'
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    if quantity <= 0:
+        return 'Quantity must be greater than 0'
 
-    # Create cart table for temporary cart items
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cart (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id TEXT NOT NULL,
-            item_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL CHECK(quantity > 0),
-            unit_price REAL NOT NULL CHECK(unit_price >= 0),
-            total_price REAL NOT NULL CHECK(total_price >= 0),
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers(cust_id)
-        )
-    ''')
+    return None
 
-    # Create order_items table for finalized orders (more detailed than order_details)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            bill_id TEXT NOT NULL,
-            item_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL CHECK(quantity > 0),
-            unit_price REAL NOT NULL CHECK(unit_price >= 0),
-            total_price REAL NOT NULL CHECK(total_price >= 0),
-            FOREIGN KEY (bill_id) REFERENCES orders(bill_id)
-        )
-    ''')
 
-    conn.commit()
-    conn.close()
+def _upsert_params(customer_id, item_name, quantity):
+    unit_price = ITEM_COSTS[item_name]
+    return (customer_id, item_name, quantity, unit_price, unit_price * quantity)
 
 
 def add_to_cart(customer_id, item_name, quantity):
@@ -77,52 +72,161 @@ def add_to_cart(customer_id, item_name, quantity):
     Returns:
         dict: Success status and message
     """
+    error = _validate_cart_item(item_name, quantity)
+    if error:
+        return {'success': False, 'message': error}
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(CART_UPSERT_SQL, _upsert_params(customer_id, item_name, quantity))
+
+        conn.commit()
+        db.release_connection(conn)
+        versions.cart_changed(customer_id)
+
+        return {'success': True, 'message': f'{item_name} added to cart successfully'}
+
+    except sqlite3.Error as e:
+        db.release_connection(conn)
+        return {'success': False, 'message': f'Database error: {str(e)}'}
+
+
+# Operations accepted by apply_cart_operations()
+CART_OPERATIONS = ('add', 'set', 'remove')
+
+CART_OPERATION_MESSAGES = {
+    'add': '{} added to cart successfully',
+    'set': '{} quantity updated',
+    'remove': '{} removed from cart'
+}
+
+# Sets the customer's row for an item to an exact quantity, creating it if there is none
+CART_SET_SQL = '''
+    INSERT INTO cart (customer_id, item_name, quantity, unit_price, total_price)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (customer_id, item_name) DO UPDATE SET
+        quantity = excluded.quantity,
+        unit_price = excluded.unit_price,
+        total_price = excluded.total_price,
+        added_at = CURRENT_TIMESTAMP
+'''
+
+
+def _query_cart_items(cursor, customer_id):
+    cursor.execute('''
+        SELECT item_name, quantity, unit_price, total_price, added_at
+        FROM cart
+        WHERE customer_id = ?
+        ORDER BY added_at DESC
+    ''', (customer_id,))
+
+    items = []
+    for row in cursor.fetchall():
+        items.append({
+            'item_name': row['item_name'],
+            'quantity': row['quantity'],
+            'unit_price': row['unit_price'],
+            'total_price': row['total_price'],
+            'added_at': row['added_at']
+        })
+    return items
+
+
+def _parse_cart_operation(operation):
+    """
+    Validate one cart operation.
+
+    Returns:
+        tuple: (op, item_name, quantity, error); error is None for a valid operation
+    """
+    op = operation.get('op')
+    item_name = operation.get('item_name')
+
+    if op not in CART_OPERATIONS:
+        return op, item_name, 0, f'Unknown cart operation: {op}'
     if item_name not in ITEM_COSTS:
-        return {'success': False, 'message': 'Invalid item selected'}
+        return op, item_name, 0, f'Invalid item selected: {item_name}'
+    if op == 'remove':
+        return op, item_name, 0, None
 
-    if quantity <= 0:
-        return {'success': False, 'message': 'Quantity must be greater than 0'}
+    try:
+        quantity = int(operation.get('quantity', 0))
+    except (TypeError, ValueError):
+        return op, item_name, 0, f'Invalid quantity for {item_name}'
 
-    init_cart_database()
+    if op == 'add':
+        error = _validate_cart_item(item_name, quantity)
+        return op, item_name, quantity, f'{error}: {item_name}' if error else None
+    if quantity < 0:
+        return op, item_name, quantity, f'Quantity cannot be negative: {item_name}'
+    return op, item_name, quantity, None
 
-    unit_price = ITEM_COSTS[item_name]
-    total_price = unit_price * quantity
 
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+def apply_cart_operations(customer_id, operations):
+    """
+    Apply a list of cart operations in one transaction and return the resulting cart.
+
+    Each operation is a dict with 'op' and 'item_name', plus 'quantity' for:
+      - 'add': add quantity to the item (creating it if needed)
+      - 'set': set the item to exactly quantity (0 removes it)
+      - 'remove': remove the item (a no-op if it is not in the cart)
+
+    Operations run in list order. If any operation is invalid nothing is changed.
+
+    Args:
+        customer_id (str): Customer ID
+        operations (list): List of operation dicts
+
+    Returns:
+        dict: Success status, message, the cart items and their total
+    """
+    if not operations:
+        return {'success': False, 'message': 'No cart operations given'}
+
+    parsed = []
+    for operation in operations:
+        op, item_name, quantity, error = _parse_cart_operation(operation)
+        if error:
+            return {'success': False, 'message': error}
+        parsed.append((op, item_name, quantity))
+
+    def apply(conn):
+        cursor = conn.cursor()
+
+        for op, item_name, quantity in parsed:
+            if op == 'add':
+                cursor.execute(CART_UPSERT_SQL, _upsert_params(customer_id, item_name, quantity))
+            elif op == 'set' and quantity > 0:
+                cursor.execute(CART_SET_SQL, _upsert_params(customer_id, item_name, quantity))
+            else:
+                cursor.execute('''
+                    DELETE FROM cart
+                    WHERE customer_id = ? AND item_name = ?
+                ''', (customer_id, item_name))
+
+        # Read the cart back inside the same transaction, so it reflects exactly these operations
+        return _query_cart_items(cursor, customer_id)
 
     try:
-        # Check if item already exists in cart
-        cursor.execute('''
-            SELECT id, quantity, total_price FROM cart
-            WHERE customer_id = ? AND item_name = ?
-        ''', (customer_id, item_name))
+        items = db.run_in_transaction(apply)
+        versions.cart_changed(customer_id)
 
-        existing_item = cursor.fetchone()
-
-        if existing_item:
-            # Update existing item
-            new_quantity = existing_item[1] + quantity
-            new_total = unit_price * new_quantity
-            cursor.execute('''
-                UPDATE cart
-                SET quantity = ?, total_price = ?, added_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (new_quantity, new_total, existing_item[0]))
+        if len(parsed) == 1:
+            op, item_name, _ = parsed[0]
+            message = CART_OPERATION_MESSAGES[op].format(item_name)
         else:
-            # Add new item
-            cursor.execute('''
-                INSERT INTO cart (customer_id, item_name, quantity, unit_price, total_price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (customer_id, item_name, quantity, unit_price, total_price))
+            message = f'Cart updated ({len(parsed)} changes)'
 
-        conn.commit()
-        conn.close()
-
-        return {'success': True, 'message': f'{item_name} added to cart successfully'}
+        return {
+            'success': True,
+            'message': message,
+            'items': items,
+            'total': float(sum(item['total_price'] for item in items))
+        }
 
     except sqlite3.Error as e:
-        conn.close()
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 
@@ -136,35 +240,17 @@ def get_cart_items(customer_id):
     Returns:
         list: List of cart items with item details
     """
-    init_cart_database()
-
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-            SELECT item_name, quantity, unit_price, total_price, added_at
-            FROM cart
-            WHERE customer_id = ?
-            ORDER BY added_at DESC
-        ''', (customer_id,))
+        items = _query_cart_items(cursor, customer_id)
 
-        items = []
-        for row in cursor.fetchall():
-            items.append({
-                'item_name': row['item_name'],
-                'quantity': row['quantity'],
-                'unit_price': row['unit_price'],
-                'total_price': row['total_price'],
-                'added_at': row['added_at']
-            })
-
-        conn.close()
+        db.release_connection(conn)
         return items
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return []
 
 
@@ -183,15 +269,13 @@ def update_cart_item(customer_id, item_name, new_quantity):
     if new_quantity <= 0:
         return remove_from_cart(customer_id, item_name)
 
-    init_cart_database()
-
     unit_price = ITEM_COSTS.get(item_name)
     if not unit_price:
         return {'success': False, 'message': 'Invalid item'}
 
     new_total = unit_price * new_quantity
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -203,7 +287,8 @@ def update_cart_item(customer_id, item_name, new_quantity):
 
         success = cursor.rowcount > 0
         conn.commit()
-        conn.close()
+        db.release_connection(conn)
+        versions.cart_changed(customer_id)
 
         if success:
             return {'success': True, 'message': f'{item_name} quantity updated'}
@@ -211,7 +296,7 @@ def update_cart_item(customer_id, item_name, new_quantity):
             return {'success': False, 'message': 'Item not found in cart'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 
@@ -226,9 +311,7 @@ def remove_from_cart(customer_id, item_name):
     Returns:
         dict: Success status and message
     """
-    init_cart_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -239,7 +322,8 @@ def remove_from_cart(customer_id, item_name):
 
         success = cursor.rowcount > 0
         conn.commit()
-        conn.close()
+        db.release_connection(conn)
+        versions.cart_changed(customer_id)
 
         if success:
             return {'success': True, 'message': f'{item_name} removed from cart'}
@@ -247,7 +331,7 @@ def remove_from_cart(customer_id, item_name):
             return {'success': False, 'message': 'Item not found in cart'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 
@@ -261,20 +345,19 @@ def clear_cart(customer_id):
     Returns:
         dict: Success status and message
     """
-    init_cart_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
         cursor.execute('DELETE FROM cart WHERE customer_id = ?', (customer_id,))
         conn.commit()
-        conn.close()
+        db.release_connection(conn)
+        versions.cart_changed(customer_id)
 
         return {'success': True, 'message': 'Cart cleared successfully'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 
@@ -288,9 +371,7 @@ def get_cart_total(customer_id):
     Returns:
         float: Total cost
     """
-    init_cart_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -299,17 +380,18 @@ def get_cart_total(customer_id):
         ''', (customer_id,))
 
         total = cursor.fetchone()[0] or 0
-        conn.close()
+        db.release_connection(conn)
         return float(total)
 
     except sqlite3.Error:
-        conn.close()
+        db.release_connection(conn)
         return 0
 
 
 def calculate_delivery_date(pickup_date_str):
     """
-    Calculate delivery date based on current active orders (not delivered).
+    Calculate delivery date: the earliest day after pickup that still has free
+    delivery capacity (see delivery_slots).
 
     Args:
         pickup_date_str (str): Pickup date in DD-MM-YYYY format
@@ -317,30 +399,49 @@ def calculate_delivery_date(pickup_date_str):
     Returns:
         str: Delivery date in DD-MM-YYYY format
     """
-    # Import OwnerSOD to check active orders count
-    import OwnerSOD
-
-    # Get all orders that are not yet delivered (active orders)
-    active_orders = OwnerSOD.get_all_orders(None)  # Get all orders
-    undelivered_count = sum(1 for order in active_orders
-                           if order['delivery_status'] != 'Delivered')
-
     # Parse pickup date
     pickup_date = datetime.strptime(pickup_date_str, '%d-%m-%Y').date()
 
-    # Calculate delivery date based on active order count
-    if undelivered_count < 5:
-        delivery_date = pickup_date + timedelta(days=1)
-    else:
-        delivery_date = pickup_date + timedelta(days=2)
+    conn = db.get_connection()
+
+    try:
+        delivery_date = delivery_slots.find_delivery_date(conn, pickup_date)
+    finally:
+        db.release_connection(conn)
 
     return delivery_date.strftime('%d-%m-%Y')
 
 
+def allocate_bill_id(cursor):
+    """
+    Allocate the next bill ID from the bill_id sequence.
+
+    The sequence row is incremented in the caller's transaction, so the ID is
+    only consumed if that transaction commits and concurrent writers are
+    serialized on the row instead of racing on a COUNT(*) of orders.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the write transaction that inserts the order
+
+    Returns:
+        str: Bill ID such as 'B001'
+    """
+    cursor.execute('''
+        UPDATE id_sequences SET value = value + 1
+        WHERE name = 'bill_id'
+        RETURNING value
+    ''')
+    return f'B{cursor.fetchone()[0]:03d}'
+
+
 def place_order(customer_id, pickup_date_str, pickup_address, delivery_address):
     """
     Place order from cart items and calculate delivery date.
 
+    The whole checkout (cart read, delivery slot and bill ID allocation, order
+    and item inserts, cart clear) runs as one BEGIN IMMEDIATE transaction on
+    one connection, retried with backoff if the database is busy.
+
     Args:
         customer_id (str): Customer ID
         pickup_date_str (str): Pickup date in DD-MM-YYYY format
@@ -350,56 +451,56 @@ def place_order(customer_id, pickup_date_str, pickup_address, delivery_address):
     Returns:
         dict: Order details and success status
     """
-    init_cart_database()
+    # Validate addresses
+    if not pickup_address or not pickup_address.strip():
+        return {'success': False, 'message': 'Pickup address is required'}
 
-    # Get customer info
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    if not delivery_address or not delivery_address.strip():
+        return {'success': False, 'message': 'Delivery address is required'}
+
+    # Sanitize addresses (remove potentially harmful characters)
+    pickup_address = pickup_address.strip()[:500]  # Limit length
+    delivery_address = delivery_address.strip()[:500]  # Limit length
 
     try:
+        pickup_date = datetime.strptime(pickup_date_str, '%d-%m-%Y').date()
+    except (TypeError, ValueError):
+        return {'success': False, 'message': 'Invalid pickup date'}
+
+    def checkout(conn):
+        cursor = conn.cursor()
+
         # Get customer name
         cursor.execute('SELECT cust_name FROM customers WHERE cust_id = ?', (customer_id,))
         customer_row = cursor.fetchone()
         if not customer_row:
-            conn.close()
             return {'success': False, 'message': 'Customer not found'}
 
         customer_name = customer_row[0]
 
-        # Get cart items
-        cart_items = get_cart_items(customer_id)
+        # Get cart items once; the write lock keeps them stable until the cart is cleared
+        cursor.execute('''
+            SELECT item_name, quantity, unit_price, total_price, added_at
+            FROM cart
+            WHERE customer_id = ?
+            ORDER BY added_at DESC
+        ''', (customer_id,))
+        cart_items = [dict(row) for row in cursor.fetchall()]
         if not cart_items:
-            conn.close()
             return {'success': False, 'message': 'Cart is empty'}
 
-        # Calculate total (subtotal)
-        subtotal_amount = get_cart_total(customer_id)
+        # Calculate total (subtotal) from the items just read
+        subtotal_amount = float(sum(item['total_price'] for item in cart_items))
 
         # Calculate GST (18%)
-        gst_rate = 0.18
-        gst_amount = round(subtotal_amount * gst_rate, 2)
+        gst_amount = round(subtotal_amount * GST_RATE, 2)
         final_bill_amount = round(subtotal_amount + gst_amount, 2)
 
         # Calculate delivery date
-        delivery_date_str = calculate_delivery_date(pickup_date_str)
+        delivery_date_str = delivery_slots.find_delivery_date(conn, pickup_date).strftime('%d-%m-%Y')
 
         # Generate bill ID
-        cursor.execute('SELECT COUNT(*) FROM orders')
-        order_count = cursor.fetchone()[0]
-        bill_id = f'B{order_count + 1:03d}'
-
-        # Validate addresses
-        if not pickup_address or not pickup_address.strip():
-            conn.close()
-            return {'success': False, 'message': 'Pickup address is required'}
-
-        if not delivery_address or not delivery_address.strip():
-            conn.close()
-            return {'success': False, 'message': 'Delivery address is required'}
-
-        # Sanitize addresses (remove potentially harmful characters)
-        pickup_address = pickup_address.strip()[:500]  # Limit length
-        delivery_address = delivery_address.strip()[:500]  # Limit length
+        bill_id = allocate_bill_id(cursor)
 
         # Create order record
         cursor.execute('''
@@ -410,19 +511,15 @@ def place_order(customer_id, pickup_date_str, pickup_address, delivery_address):
               delivery_date_str, final_bill_amount, bill_id, 'Order Placed'))
 
         # Move cart items to order_items table
-        for item in cart_items:
-            cursor.execute('''
-                INSERT INTO order_items (bill_id, item_name, quantity, unit_price, total_price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (bill_id, item['item_name'], item['quantity'],
-                  item['unit_price'], item['total_price']))
+        cursor.executemany('''
+            INSERT INTO order_items (bill_id, item_name, quantity, unit_price, total_price)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(bill_id, item['item_name'], item['quantity'], item['unit_price'], item['total_price'])
+              for item in cart_items])
 
         # Clear cart
         cursor.execute('DELETE FROM cart WHERE customer_id = ?', (customer_id,))
 
-        conn.commit()
-        conn.close()
-
         return {
             'success': True,
             'message': 'Order placed successfully!',
@@ -438,27 +535,31 @@ def place_order(customer_id, pickup_date_str, pickup_address, delivery_address):
             }
         }
 
+    try:
+        result = db.run_in_transaction(checkout)
+        if result['success']:
+            CustSOD.invalidate_customer_statistics(customer_id)
+            versions.orders_changed(customer_id)
+            versions.cart_changed(customer_id)
+        return result
+
     except sqlite3.Error as e:
-        conn.close()
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 
 def get_available_pickup_dates():
     """
-    Get available pickup dates (today + next 10 days).
+    Get available pickup dates (today + next 10 days), each with the delivery
+    date an order picked up that day would get and that day's remaining capacity.
 
     Returns:
-        list: List of available dates in DD-MM-YYYY format
+        list: List of dicts with 'date' and 'delivery_date' (DD-MM-YYYY) and 'remaining_capacity'
     """
-    dates = []
     today = datetime.now().date()
+    days = [today + timedelta(days=i) for i in range(11)]  # Today + 10 days
 
-    for i in range(11):  # Today + 10 days
-        date = today + timedelta(days=i)
-        dates.append(date.strftime('%d-%m-%Y'))
-
-    return dates
-
+    options = delivery_slots.get_delivery_options(days)
 
-# Initialize database when module is imported
-init_cart_database()
+    return [{'date': day.strftime('%d-%m-%Y'),
+             'delivery_date': options[day][0].strftime('%d-%m-%Y'),
+             'remaining_capacity': options[day][1]} for day in days]
@@ -1,38 +1,115 @@
 # Owner Status of Delivery module
 # Flask-compatible module for managing order delivery status
 
+import base64
+import json
 import sqlite3
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
+import bill
+import CustSOD
+import db
+import events
+import versions
 
+# Orders per page of the owner order listing, and the largest page a client may ask for
+ORDERS_PAGE_SIZE = 50
+MAX_ORDERS_PAGE_SIZE = 500
 
-def init_order_details_database():
+
+def encode_cursor(delivery_date_iso, bill_id):
     """
-    Initialize the SQLite database and create order_details table if it doesn't exist.
-    Also migrates data from CSV file if database is empty.
-    The table stores combined item and quantity data per order.
+    Encode the sort key of the last order on a page as an opaque cursor token.
+
+    Args:
+        delivery_date_iso (str): Delivery date of the order (YYYY-MM-DD)
+        bill_id (str): Bill ID of the order
+
+    Returns:
+        str: URL-safe cursor token
     """
-    # Import monthrep to ensure orders table exists
-    import monthrep
-    monthrep.init_orders_database()
-    
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    # Create order_details table if it doesn't exist
-    # This table combines items and quantities per order (like Flipkart style)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS order_details (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            bill_id TEXT NOT NULL,
-            customer_name TEXT NOT NULL,
-            items_details TEXT NOT NULL
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    key = json.dumps([delivery_date_iso, bill_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token created by encode_cursor().
+
+    Args:
+        token (str): Cursor token
+
+    Returns:
+        tuple: (delivery_date_iso, bill_id), or None if the token is invalid
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(part, str) for part in key)):
+        return None
+    return key[0], key[1]
+
+
+def _order_from_row(row):
+    return {
+        'bill_id': row['bill_id'],
+        'customer_id': row['customer_id'],
+        'customer_name': row['customer_name'],
+        'order_pickup_date': row['order_pickup_date'],
+        'order_delivery_date': row['order_delivery_date'],
+        'bill_amount': row['bill_amount'],
+        'delivery_status': row['delivery_status'],
+        'items_details': row['items_details'] if row['items_details'] else 'No items'
+    }
+
+
+def _query_orders(cursor, status_filter=None, after=None, limit=None):
+    """
+    Run the owner order listing query, newest delivery date first.
+
+    Walks orders in indexed (delivery_date_iso, bill_id) order and aggregates each
+    order's items through the order_items(bill_id) index, so no GROUP BY or temp
+    sort is needed. With `after` the walk starts just past that sort key
+    (keyset pagination), so every page costs the same however deep it is.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor to run the query on
+        status_filter (str): Delivery status to filter by, or None for all
+        after (tuple): (delivery_date_iso, bill_id) of the last order already returned
+        limit (int): Maximum number of rows, or None for all
+
+    Returns:
+        sqlite3.Cursor: The executed cursor; also selects delivery_date_iso
+    """
+    conditions = []
+    params = []
+
+    if status_filter:
+        conditions.append('o.delivery_status = ?')
+        params.append(status_filter)
+
+    if after:
+        conditions.append('(o.delivery_date_iso, o.bill_id) < (?, ?)')
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    paging = ''
+    if limit is not None:
+        paging = 'LIMIT ?'
+        params.append(limit)
+
+    return cursor.execute(f'''
+        SELECT o.bill_id, o.customer_id, o.customer_name, o.order_pickup_date,
+               o.order_delivery_date, o.bill_amount, o.delivery_status, o.delivery_date_iso,
+               (SELECT GROUP_CONCAT(oi.quantity || 'x ' || oi.item_name, ', ')
+                FROM order_items oi
+                WHERE oi.bill_id = o.bill_id) as items_details
+        FROM orders o
+        {where}
+        ORDER BY o.delivery_date_iso DESC, o.bill_id DESC
+        {paging}
+    ''', params)
 
 
 def get_all_orders(status_filter=None):
@@ -40,81 +117,89 @@ def get_all_orders(status_filter=None):
     Get all orders from database, optionally filtered by delivery status.
     
     Args:
-        status_filter (str): 'Delivered', 'Undelivered', or None for all
+        status_filter (str): Delivery status to filter by, or None for all
     
     Returns:
         list: List of dictionaries containing order information with items
     """
-    init_order_details_database()
-    
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
     
     try:
-        # Build query based on status filter - aggregate items from order_items table
-        if status_filter:
-            query = '''
-                SELECT o.bill_id, o.customer_id, o.customer_name, o.order_pickup_date,
-                       o.order_delivery_date, o.bill_amount, o.delivery_status,
-                       GROUP_CONCAT(oi.quantity || 'x ' || oi.item_name, ', ') as items_details
-                FROM orders o
-                LEFT JOIN order_items oi ON o.bill_id = oi.bill_id
-                WHERE o.delivery_status = ?
-                GROUP BY o.bill_id, o.customer_id, o.customer_name, o.order_pickup_date,
-                         o.order_delivery_date, o.bill_amount, o.delivery_status
-                ORDER BY
-                    CASE
-                        WHEN length(o.order_delivery_date) = 10 AND substr(o.order_delivery_date, 3, 1) = '-' THEN
-                            substr(o.order_delivery_date, 7, 4) || '-' ||
-                            substr(o.order_delivery_date, 4, 2) || '-' ||
-                            substr(o.order_delivery_date, 1, 2)
-                        ELSE o.order_delivery_date
-                    END DESC
-            '''
-            cursor.execute(query, (status_filter,))
-        else:
-            query = '''
-                SELECT o.bill_id, o.customer_id, o.customer_name, o.order_pickup_date,
-                       o.order_delivery_date, o.bill_amount, o.delivery_status,
-                       GROUP_CONCAT(oi.quantity || 'x ' || oi.item_name, ', ') as items_details
-                FROM orders o
-                LEFT JOIN order_items oi ON o.bill_id = oi.bill_id
-                GROUP BY o.bill_id, o.customer_id, o.customer_name, o.order_pickup_date,
-                         o.order_delivery_date, o.bill_amount, o.delivery_status
-                ORDER BY
-                    CASE
-                        WHEN length(o.order_delivery_date) = 10 AND substr(o.order_delivery_date, 3, 1) = '-' THEN
-                            substr(o.order_delivery_date, 7, 4) || '-' ||
-                            substr(o.order_delivery_date, 4, 2) || '-' ||
-                            substr(o.order_delivery_date, 1, 2)
-                        ELSE o.order_delivery_date
-                    END DESC
-            '''
-            cursor.execute(query)
-
-        orders = []
-        for row in cursor.fetchall():
-            orders.append({
-                'bill_id': row['bill_id'],
-                'customer_id': row['customer_id'],
-                'customer_name': row['customer_name'],
-                'order_pickup_date': row['order_pickup_date'],
-                'order_delivery_date': row['order_delivery_date'],
-                'bill_amount': row['bill_amount'],
-                'delivery_status': row['delivery_status'],
-                'items_details': row['items_details'] if row['items_details'] else 'No items'
-            })
+        orders = [_order_from_row(row) for row in _query_orders(cursor, status_filter).fetchall()]
         
-        conn.close()
+        db.release_connection(conn)
         return orders
     
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         print(f"Database error: {e}")
         return []
 
 
+def iter_all_orders(status_filter=None, cursor_token=None):
+    """
+    Stream orders one at a time, newest delivery date first, for exports of the
+    whole order history in constant memory.
+
+    Args:
+        status_filter (str): Delivery status to filter by, or None for all
+        cursor_token (str): Start after this cursor (see get_orders_page), or None
+
+    Yields:
+        dict: Order information with items
+    """
+    after = decode_cursor(cursor_token) if cursor_token else None
+
+    for row in db.iter_rows(_query_orders, status_filter, after):
+        yield _order_from_row(row)
+
+
+def get_orders_page(status_filter=None, page_size=ORDERS_PAGE_SIZE, cursor_token=None):
+    """
+    Get one page of orders, newest delivery date first, using keyset pagination
+    on (delivery date, bill_id).
+
+    Args:
+        status_filter (str): Delivery status to filter by, or None for all
+        page_size (int): Maximum number of orders on the page
+        cursor_token (str): next_cursor from the previous page, or None for the first page
+
+    Returns:
+        dict: Dictionary with success status, orders and next_cursor
+              (None when there are no more orders)
+    """
+    after = None
+    if cursor_token:
+        after = decode_cursor(cursor_token)
+        if after is None:
+            return {'success': False, 'message': 'Invalid cursor'}
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    try:
+        # Fetch one extra row to learn whether another page follows
+        rows = _query_orders(cursor, status_filter, after, page_size + 1).fetchall()
+        db.release_connection(conn)
+
+    except sqlite3.Error as e:
+        db.release_connection(conn)
+        print(f"Database error: {e}")
+        return {'success': False, 'message': 'Failed to load orders'}
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]['delivery_date_iso'], rows[-1]['bill_id'])
+
+    return {
+        'success': True,
+        'orders': [_order_from_row(row) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+
 def get_order_details(bill_id):
     """
     Get detailed information for a specific order.
@@ -125,10 +210,7 @@ def get_order_details(bill_id):
     Returns:
         dict: Dictionary containing order details or None if not found
     """
-    init_order_details_database()
-    
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -144,7 +226,7 @@ def get_order_details(bill_id):
         ''', (bill_id,))
         
         row = cursor.fetchone()
-        conn.close()
+        db.release_connection(conn)
         
         if row:
             return {
@@ -162,14 +244,17 @@ def get_order_details(bill_id):
         return None
     
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         print(f"Database error: {e}")
         return None
 
 
 def update_delivery_status(bill_id, status, cancelled_by=None):
     """
-    Update the delivery status of an order.
+    Update the delivery status of an order. Moving an order to Delivered or
+    Cancelled releases its delivery slot (done by triggers, see delivery_slots),
+    and the customer's cached statistics and the order's cached bill are invalidated,
+    its data versions bumped and the change pushed to the customer's open pages.
 
     Args:
         bill_id (str): The bill ID of the order
@@ -179,9 +264,7 @@ def update_delivery_status(bill_id, status, cancelled_by=None):
     Returns:
         bool: True if update was successful, False otherwise
     """
-    init_order_details_database()
-    
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -190,24 +273,29 @@ def update_delivery_status(bill_id, status, cancelled_by=None):
                 UPDATE orders
                 SET delivery_status = ?, cancelled_by = ?
                 WHERE bill_id = ?
+                RETURNING customer_id
             ''', (status, cancelled_by, bill_id))
         else:
             cursor.execute('''
                 UPDATE orders
                 SET delivery_status = ?
                 WHERE bill_id = ?
+                RETURNING customer_id
             ''', (status, bill_id))
         
+        updated = cursor.fetchall()
         conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        return success
+        db.release_connection(conn)
+
+        for row in updated:
+            CustSOD.invalidate_customer_statistics(row['customer_id'])
+            bill.invalidate_bill(bill_id)
+            versions.orders_changed(row['customer_id'])
+            events.publish_order_status(row['customer_id'], bill_id, status,
+                                        cancelled_by if status == 'Cancelled' else None)
+        return len(updated) > 0
     
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         print(f"Database error: {e}")
         return False
-
-
-# Initialize database when module is imported
-init_order_details_database()
@@ -5,33 +5,7 @@
 import sqlite3
 from flask import session
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
-
-
-def init_database():
-    """
-    Initialize the SQLite database and create customers table if it doesn't exist.
-    Also migrates data from CSV file if database is empty.
-    """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    # Create customers table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            cust_id TEXT PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            cust_name TEXT NOT NULL,
-            mobile_no TEXT NOT NULL CHECK(length(mobile_no) = 10 AND mobile_no GLOB '[0-9]*'),
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+import db
 
 
 def authenticate_customer(username, password):
@@ -46,11 +20,7 @@ def authenticate_customer(username, password):
         dict: Dictionary with 'success' (bool) and 'customer_data' (dict) or 'message' (str)
               If successful, customer_data contains: cust_id, username, cust_name, mobile_no
     """
-    # Initialize database on first use
-    init_database()
-    
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # This allows column access by name
+    conn = db.get_connection()
     cursor = conn.cursor()
     
     try:
@@ -71,7 +41,7 @@ def authenticate_customer(username, password):
                 'cust_name': customer['cust_name'],
                 'mobile_no': customer['mobile_no']
             }
-            conn.close()
+            db.release_connection(conn)
             return {
                 'success': True,
                 'customer_data': customer_data,
@@ -81,20 +51,20 @@ def authenticate_customer(username, password):
             # Check if username exists but password is wrong
             cursor.execute('SELECT username FROM customers WHERE username = ?', (username,))
             if cursor.fetchone():
-                conn.close()
+                db.release_connection(conn)
                 return {
                     'success': False,
                     'message': 'Invalid password. Please check your credentials.'
                 }
             else:
-                conn.close()
+                db.release_connection(conn)
                 return {
                     'success': False,
                     'message': 'Customer not found. Please check your username.'
                 }
     
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {
             'success': False,
             'message': f'Database error: {str(e)}'
@@ -114,9 +84,6 @@ def customer_signup(name, username, phone, password):
     Returns:
         dict: Registration result with 'success' (bool) and 'message' (str)
     """
-    # Initialize database on first use
-    init_database()
-
     # Validate inputs
     if not all([name, username, phone, password]):
         return {
@@ -142,14 +109,14 @@ def customer_signup(name, username, phone, password):
             'message': 'Name must be between 2 and 100 characters.'
         }
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
         # Check if username already exists
         cursor.execute('SELECT username FROM customers WHERE username = ?', (username,))
         if cursor.fetchone():
-            conn.close()
+            db.release_connection(conn)
             return {
                 'success': False,
                 'message': 'Username already exists. Please choose a different username.'
@@ -166,7 +133,7 @@ def customer_signup(name, username, phone, password):
         ''', (cust_id, username, password, name, phone))
 
         conn.commit()
-        conn.close()
+        db.release_connection(conn)
 
         return {
             'success': True,
@@ -180,7 +147,7 @@ def customer_signup(name, username, phone, password):
         }
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {
             'success': False,
             'message': f'Database error: {str(e)}'
@@ -222,7 +189,3 @@ def customer_sign_in(request):
         session['logged_in'] = True
 
     return auth_result
-
-
-# Initialize database when module is imported
-init_database()
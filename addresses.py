@@ -7,37 +7,8 @@ Handles customer saved addresses with CRUD operations.
 import sqlite3
 import os
 
-DB_FILE = 'customer_db.sqlite'
-
-def init_addresses_database():
-    """Initialize the addresses table if it doesn't exist"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    # Create addresses table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS addresses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id TEXT NOT NULL,
-            address_type TEXT NOT NULL DEFAULT 'Home'
-                CHECK(address_type IN ('Home', 'Work', 'Other')),
-            full_name TEXT NOT NULL,
-            phone TEXT NOT NULL CHECK(length(phone) = 10 AND phone GLOB '[0-9]*'),
-            address_line1 TEXT NOT NULL,
-            address_line2 TEXT,
-            city TEXT NOT NULL DEFAULT 'Mumbai',
-            state TEXT NOT NULL DEFAULT 'Maharashtra',
-            pincode TEXT NOT NULL CHECK(length(pincode) = 6 AND pincode GLOB '[0-9]*'),
-            landmark TEXT,
-            is_default BOOLEAN DEFAULT 0,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (customer_id) REFERENCES customers(cust_id) ON DELETE CASCADE
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
+import db
+import versions
 
 def add_customer_address(customer_id, address_data):
     """
@@ -50,9 +21,7 @@ def add_customer_address(customer_id, address_data):
     Returns:
         dict: Success status and message
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -60,7 +29,7 @@ def add_customer_address(customer_id, address_data):
         required_fields = ['full_name', 'phone', 'address_line1', 'city', 'state', 'pincode']
         for field in required_fields:
             if field not in address_data or not address_data[field] or not address_data[field].strip():
-                conn.close()
+                db.release_connection(conn)
                 return {'success': False, 'message': f'{field.replace("_", " ").title()} is required'}
 
         # Sanitize inputs
@@ -76,11 +45,11 @@ def add_customer_address(customer_id, address_data):
 
         # Validate phone and pincode
         if not phone.isdigit() or len(phone) != 10:
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Phone number must be 10 digits'}
 
         if not pincode.isdigit() or len(pincode) != 6:
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Pincode must be 6 digits'}
 
         # If this is set as default, unset other defaults for this customer
@@ -98,11 +67,12 @@ def add_customer_address(customer_id, address_data):
         conn.commit()
         address_id = cursor.lastrowid
 
-        conn.close()
+        db.release_connection(conn)
+        versions.addresses_changed(customer_id)
         return {'success': True, 'message': 'Address added successfully', 'address_id': address_id}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 def get_customer_addresses(customer_id):
@@ -115,10 +85,7 @@ def get_customer_addresses(customer_id):
     Returns:
         list: List of address dictionaries
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -142,11 +109,11 @@ def get_customer_addresses(customer_id):
             address['full_address'] = full_address
             addresses.append(address)
 
-        conn.close()
+        db.release_connection(conn)
         return addresses
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return []
 
 def update_customer_address(customer_id, address_id, address_data):
@@ -161,9 +128,7 @@ def update_customer_address(customer_id, address_id, address_data):
     Returns:
         dict: Success status and message
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -171,7 +136,7 @@ def update_customer_address(customer_id, address_id, address_data):
         cursor.execute('SELECT id FROM addresses WHERE id = ? AND customer_id = ?',
                       (address_id, customer_id))
         if not cursor.fetchone():
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Address not found or access denied'}
 
         # Build update query dynamically
@@ -197,7 +162,7 @@ def update_customer_address(customer_id, address_id, address_data):
                 values.append(address_data[key])
 
         if not update_fields:
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'No valid fields to update'}
 
         # Handle special case for is_default
@@ -212,14 +177,15 @@ def update_customer_address(customer_id, address_id, address_data):
 
         if cursor.rowcount > 0:
             conn.commit()
-            conn.close()
+            db.release_connection(conn)
+            versions.addresses_changed(customer_id)
             return {'success': True, 'message': 'Address updated successfully'}
         else:
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Address not found or no changes made'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 def delete_customer_address(customer_id, address_id):
@@ -233,9 +199,7 @@ def delete_customer_address(customer_id, address_id):
     Returns:
         dict: Success status and message
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -244,14 +208,15 @@ def delete_customer_address(customer_id, address_id):
 
         if cursor.rowcount > 0:
             conn.commit()
-            conn.close()
+            db.release_connection(conn)
+            versions.addresses_changed(customer_id)
             return {'success': True, 'message': 'Address deleted successfully'}
         else:
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Address not found or access denied'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 def set_default_address(customer_id, address_id):
@@ -265,9 +230,7 @@ def set_default_address(customer_id, address_id):
     Returns:
         dict: Success status and message
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -275,7 +238,7 @@ def set_default_address(customer_id, address_id):
         cursor.execute('SELECT id FROM addresses WHERE id = ? AND customer_id = ?',
                       (address_id, customer_id))
         if not cursor.fetchone():
-            conn.close()
+            db.release_connection(conn)
             return {'success': False, 'message': 'Address not found or access denied'}
 
         # Unset all defaults for this customer
@@ -286,11 +249,12 @@ def set_default_address(customer_id, address_id):
                       (address_id, customer_id))
 
         conn.commit()
-        conn.close()
+        db.release_connection(conn)
+        versions.addresses_changed(customer_id)
         return {'success': True, 'message': 'Default address updated successfully'}
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return {'success': False, 'message': f'Database error: {str(e)}'}
 
 def get_customer_default_address(customer_id):
@@ -303,10 +267,7 @@ def get_customer_default_address(customer_id):
     Returns:
         dict or None: Default address or None if no default exists
     """
-    init_addresses_database()
-
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
 
     try:
@@ -317,7 +278,7 @@ def get_customer_default_address(customer_id):
         ''', (customer_id,))
 
         row = cursor.fetchone()
-        conn.close()
+        db.release_connection(conn)
 
         if row:
             address = dict(row)
@@ -334,8 +295,5 @@ def get_customer_default_address(customer_id):
             return None
 
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         return None
-
-# Initialize the addresses table when module is imported
-init_addresses_database()
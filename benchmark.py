@@ -0,0 +1,463 @@
+# Benchmark module
+# Seeds a throwaway SQLite database and times the data-layer hot paths.
+#
+# Usage:
+#   python benchmark.py customer-orders [--orders 3000] [--repeat 20]
+#   python benchmark.py bill-ids [--workers 16] [--rounds 10]
+#   python benchmark.py customer-stats [--orders 100000]
+#   python benchmark.py orders-page [--orders 100000]
+#   python benchmark.py stream [--orders 100000]
+#   python benchmark.py export [--orders 100000]
+#   python benchmark.py import [--orders 200000]
+#   python benchmark.py concurrency [--readers 4] [--writers 4] [--duration 3]
+#   python benchmark.py compression [--orders 100000]
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import db
+import schema
+
+STATUSES = ['Order Placed', 'Order Picked', 'In Process', 'Out for Delivery', 'Delivered', 'Cancelled']
+ITEMS = [('Shirt', 15), ('Pant', 20), ('Suit', 25), ('Socks', 10), ('Dress', 20), ('Jeans', 21), ('T-shirt', 12)]
+
+
+def seed_database(db_file, customers=10, orders=3000, seed=42, storage_profile=None):
+    """
+    Create a migrated database filled with synthetic customers, orders and items.
+
+    Orders are spread round-robin over the customers, with delivery dates over
+    the last three years and one to four items each.
+
+    Args:
+        db_file (str): Path of the database file to create
+        customers (int): Number of customers
+        orders (int): Total number of orders
+        seed (int): Random seed so runs are comparable
+        storage_profile (dict): PRAGMAs for the pool (default: db.STORAGE_PROFILE)
+
+    Returns:
+        list: Customer IDs that were created
+    """
+    rng = random.Random(seed)
+    db.configure(db_file, storage_profile=storage_profile)
+    schema.migrate()
+
+    customer_ids = [f'C{n:05d}' for n in range(customers)]
+    order_rows = []
+    item_rows = []
+    start = date.today() - timedelta(days=3 * 365)
+
+    for n in range(orders):
+        customer_id = customer_ids[n % customers]
+        bill_id = f'B{n + 1:03d}'
+        pickup = start + timedelta(days=rng.randrange(3 * 365))
+        delivery = pickup + timedelta(days=rng.choice([1, 2]))
+
+        subtotal = 0
+        for item_name, unit_price in rng.sample(ITEMS, rng.randint(1, 4)):
+            quantity = rng.randint(1, 5)
+            subtotal += unit_price * quantity
+            item_rows.append((bill_id, item_name, quantity, unit_price, unit_price * quantity))
+
+        order_rows.append((customer_id, f'Customer {customer_id}', 'Pickup address', 'Delivery address',
+                           pickup.strftime('%d-%m-%Y'), delivery.strftime('%d-%m-%Y'),
+                           round(subtotal * 1.18, 2), bill_id, rng.choice(STATUSES)))
+
+    conn = db.get_connection()
+    try:
+        conn.executemany('''
+            INSERT INTO customers (cust_id, username, password, cust_name, mobile_no)
+            VALUES (?, ?, 'password', ?, '9876543210')
+        ''', [(cid, f'{cid}@example.com', f'Customer {cid}') for cid in customer_ids])
+        conn.executemany('''
+            INSERT INTO orders (customer_id, customer_name, pickup_address, delivery_address,
+                                order_pickup_date, order_delivery_date, bill_amount, bill_id, delivery_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', order_rows)
+        conn.executemany('''
+            INSERT INTO order_items (bill_id, item_name, quantity, unit_price, total_price)
+            VALUES (?, ?, ?, ?, ?)
+        ''', item_rows)
+        conn.execute("UPDATE id_sequences SET value = ? WHERE name = 'bill_id'", (orders,))
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+
+    return customer_ids
+
+
+def time_call(func, repeat):
+    """
+    Time repeated calls of func.
+
+    Returns:
+        tuple: (best seconds, mean seconds)
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), sum(timings) / len(timings)
+
+
+def report(label, timings):
+    best, mean = timings
+    print(f"  {label:<32} best {best * 1000:8.2f} ms   mean {mean * 1000:8.2f} ms")
+
+
+def _per_order_items_query(customer_id):
+    """The previous CustSOD.get_customer_orders: one items query per order."""
+    conn = db.get_connection()
+    try:
+        rows = conn.execute('''
+            SELECT bill_id, customer_id, customer_name, order_pickup_date,
+                   order_delivery_date, bill_amount, delivery_status
+            FROM orders WHERE customer_id = ? ORDER BY order_delivery_date DESC
+        ''', (customer_id,)).fetchall()
+        orders = []
+        for row in rows:
+            items = [dict(item) for item in conn.execute('''
+                SELECT item_name, quantity, unit_price, total_price
+                FROM order_items WHERE bill_id = ? ORDER BY item_name
+            ''', (row['bill_id'],)).fetchall()]
+            order = dict(row)
+            order['items_details'] = ', '.join(f"{item['quantity']}x {item['item_name']}" for item in items)
+            order['items'] = items
+            orders.append(order)
+        return orders
+    finally:
+        db.release_connection(conn)
+
+
+def bench_customer_orders(args):
+    """Compare one items query per order against the batched CustSOD.get_customer_orders."""
+    import CustSOD
+
+    customer_ids = seed_database(args.db, customers=args.customers, orders=args.orders)
+    customer_id = customer_ids[0]
+    order_count = len(CustSOD.get_customer_orders(customer_id))
+
+    print(f"customer-orders: {args.orders} orders seeded, {order_count} for customer {customer_id}")
+    per_order = time_call(lambda: _per_order_items_query(customer_id), args.repeat)
+    batched = time_call(lambda: CustSOD.get_customer_orders(customer_id), args.repeat)
+    report(f"per-order items ({order_count + 1} queries)", per_order)
+    report("batched items (2 queries)", batched)
+    print(f"  speedup: {per_order[1] / batched[1]:.1f}x")
+
+
+def bench_customer_stats(args):
+    """Compare computing customer statistics on every call against the cached CustSOD.get_customer_statistics."""
+    import CustSOD
+
+    customer_ids = seed_database(args.db, customers=args.customers, orders=args.orders)
+    customer_id = customer_ids[0]
+
+    print(f"customer-stats: {args.orders} orders seeded, {args.orders // args.customers} for customer {customer_id}")
+    report("query every call", time_call(lambda: CustSOD._query_customer_statistics(customer_id), args.repeat))
+    CustSOD.get_customer_statistics(customer_id)
+    report("cached", time_call(lambda: CustSOD.get_customer_statistics(customer_id), args.repeat))
+
+
+def bench_bill_ids(args):
+    """Stress test: many parallel place_order calls must never produce colliding bill IDs."""
+    import Manipulation_of_cart_edited as cart_module
+
+    customer_ids = seed_database(args.db, customers=args.workers, orders=args.orders)
+    pickup_date = date.today().strftime('%d-%m-%Y')
+
+    def checkout_loop(customer_id):
+        results = []
+        for _ in range(args.rounds):
+            cart_module.add_to_cart(customer_id, 'Shirt', 1)
+            results.append(cart_module.place_order(customer_id, pickup_date, 'Pickup address', 'Delivery address'))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = [result for batch in executor.map(checkout_loop, customer_ids) for result in batch]
+    elapsed = time.perf_counter() - started
+
+    bill_ids = [result['order_details']['bill_id'] for result in results if result['success']]
+    failures = Counter(result['message'] for result in results if not result['success'])
+
+    conn = db.get_connection()
+    try:
+        order_count = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    finally:
+        db.release_connection(conn)
+
+    print(f"bill-ids: {args.workers} workers x {args.rounds} checkouts in {elapsed:.2f} s")
+    print(f"  placed {len(bill_ids)}, failed {sum(failures.values())}")
+    for message, count in failures.most_common():
+        print(f"    {count} x {message}")
+    duplicates = len(bill_ids) - len(set(bill_ids))
+    print(f"  duplicate bill IDs: {duplicates}")
+    print(f"  orders table rows: {order_count} (expected {args.orders + len(bill_ids)})")
+
+    if not bill_ids or duplicates or order_count != args.orders + len(bill_ids):
+        raise SystemExit("bill-ids: FAILED")
+    print("bill-ids: OK")
+
+
+def bench_orders_page(args):
+    """Compare the full owner order listing against first and deep keyset pages."""
+    import OwnerSOD
+
+    seed_database(args.db, customers=args.customers, orders=args.orders)
+
+    # Follow next_cursor halfway through the table to get a deep page's cursor
+    deep_cursor = None
+    for _ in range(args.orders // 2 // OwnerSOD.ORDERS_PAGE_SIZE):
+        deep_cursor = OwnerSOD.get_orders_page(cursor_token=deep_cursor)['next_cursor']
+
+    print(f"orders-page: {args.orders} orders seeded, {OwnerSOD.ORDERS_PAGE_SIZE} orders per page")
+    report("full listing (get_all_orders)", time_call(OwnerSOD.get_all_orders, max(args.repeat // 10, 1)))
+    report("first page", time_call(OwnerSOD.get_orders_page, args.repeat))
+    report("page halfway through", time_call(lambda: OwnerSOD.get_orders_page(cursor_token=deep_cursor), args.repeat))
+    report("first page, status filter", time_call(lambda: OwnerSOD.get_orders_page('Delivered'), args.repeat))
+
+
+def _peak_memory(func):
+    """Run func and return (seconds, peak bytes allocated by Python while it ran)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_stream(args):
+    """Compare peak memory of building the full order list + JSON body against NDJSON streaming."""
+    import OwnerSOD
+
+    seed_database(args.db, customers=args.customers, orders=args.orders)
+
+    def full_body():
+        return json.dumps({'orders': OwnerSOD.get_all_orders()})
+
+    def streamed_body():
+        size = 0
+        for order in OwnerSOD.iter_all_orders():
+            size += len(json.dumps(order, separators=(',', ':'))) + 1
+        return size
+
+    print(f"stream: {args.orders} orders seeded")
+    for label, func in [('list + json.dumps', full_body), ('NDJSON generator', streamed_body)]:
+        elapsed, peak = _peak_memory(func)
+        print(f"  {label:<32} {elapsed * 1000:8.1f} ms   peak {peak / 1024 / 1024:8.2f} MB")
+
+
+def bench_export(args):
+    """Measure export throughput in rows per second for CSV (and Parquet when pyarrow is installed)."""
+    import export
+
+    seed_database(args.db, customers=args.customers, orders=args.orders)
+    formats = ['csv'] + (['parquet'] if export.parquet_available() else [])
+
+    print(f"export: {args.orders} orders seeded, batches of {export.EXPORT_BATCH_SIZE} rows")
+    for fmt in formats:
+        path = f'{args.db}.{fmt}'
+        _, peak = _peak_memory(lambda: export.export_orders(path, fmt=fmt))
+        result = export.export_orders(path, fmt=fmt)
+        print(f"  {fmt:<8} {result['rows']} rows   {result['rows_per_second']:>9} rows/s   "
+              f"{os.path.getsize(path) / 1024 / 1024:6.1f} MB   peak memory {peak / 1024 / 1024:5.2f} MB")
+    if not export.parquet_available():
+        print("  parquet  skipped (pyarrow not installed)")
+
+
+def _write_legacy_csvs(directory, orders, seed=42):
+    """Write synthetic customer_orders.csv / cust_order_details.csv files with legacy headers."""
+    rng = random.Random(seed)
+    orders_path = os.path.join(directory, 'customer_orders.csv')
+    items_path = os.path.join(directory, 'cust_order_details.csv')
+    start = date.today() - timedelta(days=5 * 365)
+
+    with open(orders_path, 'w', newline='') as orders_file, open(items_path, 'w', newline='') as items_file:
+        order_writer = csv.writer(orders_file)
+        item_writer = csv.writer(items_file)
+        order_writer.writerow(['Customer ID', 'Customer Name', 'Pickup Address', 'Delivery Address',
+                               'Order Pickup Date', 'Order Delivery Date', 'Bill Amount', 'Bill ID'])
+        item_writer.writerow(['Bill ID', 'Item Name', 'Quantity', 'Unit Price', 'Total Price'])
+
+        for n in range(orders):
+            bill_id = f'B{n + 1:03d}'
+            pickup = start + timedelta(days=rng.randrange(5 * 365))
+            subtotal = 0
+            for item_name, unit_price in rng.sample(ITEMS, rng.randint(1, 4)):
+                quantity = rng.randint(1, 5)
+                subtotal += unit_price * quantity
+                item_writer.writerow([bill_id, item_name, quantity, unit_price, unit_price * quantity])
+            order_writer.writerow([f'C{n % 500:05d}', f'Customer {n % 500}', 'Pickup address', 'Delivery address',
+                                   pickup.strftime('%d-%m-%Y'), (pickup + timedelta(days=1)).strftime('%d-%m-%Y'),
+                                   round(subtotal * 1.18, 2), bill_id])
+
+    return orders_path, items_path
+
+
+def bench_import(args):
+    """Load legacy CSV files with indexes and triggers kept live vs. deferred until after the load."""
+    import legacy_import
+
+    orders_path, items_path = _write_legacy_csvs(os.path.dirname(args.db), args.orders)
+    print(f"import: {args.orders} legacy orders plus their items")
+
+    for n, defer in enumerate([False, True]):
+        seed_database(f'{args.db}.{n}', customers=0, orders=0)
+        started = time.perf_counter()
+        result = legacy_import.run_import(orders_path, items_path, restart=True, defer=defer)
+        elapsed = time.perf_counter() - started
+        rows = sum(source['rows_read'] for source in result['results'].values())
+        label = 'indexes deferred' if defer else 'indexes and triggers live'
+        print(f"  => {label:<28} {rows} rows in {elapsed:6.2f} s   {round(rows / elapsed):>9} rows/s")
+        db.close_pool()
+
+
+def _run_mixed_load(args, customer_ids):
+    """Run owner-dashboard readers and checkout writers side by side for args.duration seconds."""
+    import OwnerSOD
+    import Manipulation_of_cart_edited as cart_module
+
+    pickup_date = date.today().strftime('%d-%m-%Y')
+    deadline = time.perf_counter() + args.duration
+    counts = Counter()
+    lock = threading.Lock()
+
+    def reader():
+        done = 0
+        while time.perf_counter() < deadline:
+            OwnerSOD.get_all_orders()
+            done += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer(customer_id):
+        done = failed = 0
+        while time.perf_counter() < deadline:
+            cart_module.add_to_cart(customer_id, 'Shirt', 1)
+            result = cart_module.place_order(customer_id, pickup_date, 'Pickup address', 'Delivery address')
+            if result['success']:
+                done += 1
+            else:
+                failed += 1
+        with lock:
+            counts['writes'] += done
+            counts['failed'] += failed
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(customer_ids[n % len(customer_ids)],))
+                for n in range(args.writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return counts['reads'] / elapsed, counts['writes'] / elapsed, counts['failed']
+
+
+def bench_concurrency(args):
+    """Compare read/write throughput under the default journal and the tuned WAL storage profile."""
+    profiles = [('rollback journal (DELETE, FULL)', db.LEGACY_STORAGE_PROFILE),
+                ('WAL profile (db.STORAGE_PROFILE)', db.STORAGE_PROFILE)]
+
+    print(f"concurrency: {args.readers} readers + {args.writers} writers for {args.duration:g} s, "
+          f"{args.orders} orders seeded")
+    results = []
+    for n, (label, profile) in enumerate(profiles):
+        db_file = f'{args.db}.{n}'
+        customer_ids = seed_database(db_file, customers=max(args.writers, 1), orders=args.orders,
+                                     storage_profile=profile)
+        reads, writes, failed = _run_mixed_load(args, customer_ids)
+        db.close_pool()
+        results.append((reads, writes))
+        print(f"  {label:<34} reads {reads:8.1f}/s   checkouts {writes:7.1f}/s   failed {failed}")
+
+    (legacy_reads, legacy_writes), (wal_reads, wal_writes) = results
+    if legacy_reads and legacy_writes:
+        print(f"  speedup: reads {wal_reads / legacy_reads:.1f}x, checkouts {wal_writes / legacy_writes:.1f}x")
+
+
+def bench_compression(args):
+    """Compare body sizes of the owner order list and the page templates, uncompressed and compressed."""
+    import compression
+    import OwnerSOD
+
+    seed_database(args.db, customers=args.customers, orders=args.orders)
+    encodings = ['gzip'] + (['br'] if compression.brotli is not None else [])
+
+    page = OwnerSOD.get_orders_page(page_size=OwnerSOD.ORDERS_PAGE_SIZE)
+    bodies = [
+        ('full order list (JSON)', json.dumps({'orders': OwnerSOD.get_all_orders()}).encode()),
+        ('full order list (NDJSON)', ''.join(json.dumps(order, separators=(',', ':')) + '\n'
+                                              for order in OwnerSOD.iter_all_orders()).encode()),
+        (f'one page of {OwnerSOD.ORDERS_PAGE_SIZE} orders', json.dumps({'orders': page['orders']}).encode()),
+    ]
+    for name in ('DeliveryStatusCust.html', 'own_sod.html'):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', name), 'rb') as file:
+            bodies.append((name, file.read()))
+
+    print(f"compression: {args.orders} orders seeded")
+    for label, body in bodies:
+        line = f"  {label:<28} {len(body) / 1024:9.1f} KiB"
+        for encoding in encodings:
+            started = time.perf_counter()
+            compressed = compression.compress(body, encoding)
+            elapsed = time.perf_counter() - started
+            line += (f"   {encoding} {len(compressed) / 1024:8.1f} KiB "
+                     f"({len(body) / len(compressed):4.1f}x, {elapsed * 1000:6.1f} ms)")
+        print(line)
+    if compression.brotli is None:
+        print("  br skipped (brotli not installed)")
+
+
+BENCHMARKS = {
+    'customer-orders': bench_customer_orders,
+    'customer-stats': bench_customer_stats,
+    'bill-ids': bench_bill_ids,
+    'orders-page': bench_orders_page,
+    'stream': bench_stream,
+    'export': bench_export,
+    'import': bench_import,
+    'concurrency': bench_concurrency,
+    'compression': bench_compression,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DoubleBubble data-layer benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--customers', type=int, default=10, help='customers to seed')
+    parser.add_argument('--orders', type=int, default=3000, help='orders to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='timed repetitions')
+    parser.add_argument('--workers', type=int, default=16, help='concurrent worker threads')
+    parser.add_argument('--rounds', type=int, default=10, help='checkouts per worker')
+    parser.add_argument('--readers', type=int, default=4, help='concurrent reader threads')
+    parser.add_argument('--writers', type=int, default=4, help='concurrent writer threads')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds of mixed load')
+    parser.add_argument('--db', help='database file to seed (default: temporary file)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if not args.db:
+            args.db = os.path.join(tmp_dir, 'benchmark.sqlite')
+        BENCHMARKS[args.benchmark](args)
+        db.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Bill module
+# Flask-compatible module for rendering customer bills from the bill.html template, with a cache of rendered bills
+
+from flask import render_template
+
+import cache
+import CustSOD
+from Manipulation_of_cart_edited import GST_RATE
+
+# Rendered bills are cached for this many seconds, for at most this many bills
+BILL_CACHE_TTL = 3600
+BILL_CACHE_SIZE = 512
+
+# bill_id -> (customer_id, html). An order's items and amounts never change after
+# checkout, so a status change is the only thing that makes a cached bill stale.
+_bill_cache = cache.TTLCache(BILL_CACHE_SIZE, BILL_CACHE_TTL)
+
+
+def render_bill(order_details):
+    """
+    Render the HTML bill of an order.
+
+    Args:
+        order_details (dict): Order with its items, as returned by CustSOD.get_order_details_for_customer()
+
+    Returns:
+        str: Bill HTML (styles come from static/css/bill.css)
+    """
+    subtotal = sum(float(item['total_price']) for item in order_details['items'])
+
+    # The GST charged at checkout is whatever the stored bill amount adds to the subtotal
+    gst_amount = float(order_details['bill_amount']) - subtotal
+
+    return render_template('bill.html', order=order_details, subtotal=subtotal,
+                           gst_amount=gst_amount, gst_percent=round(GST_RATE * 100))
+
+
+def get_bill_html(bill_id, customer_id):
+    """
+    Get the rendered bill of a customer's order, rendering and caching it on first use.
+    A cached bill is served without querying the database.
+
+    Args:
+        bill_id (str): The bill ID of the order
+        customer_id (str): The customer ID for security check
+
+    Returns:
+        str: Bill HTML, or None if the order is not found or belongs to another customer
+    """
+    cached = _bill_cache.get(bill_id)
+    if cached is not None:
+        owner_id, html = cached
+        return html if owner_id == customer_id else None
+
+    generation = _bill_cache.generation()
+    order_details = CustSOD.get_order_details_for_customer(bill_id, customer_id)
+    if not order_details:
+        return None
+
+    html = render_bill(order_details)
+    _bill_cache.set(bill_id, (customer_id, html), generation)
+    return html
+
+
+def invalidate_bill(bill_id):
+    """
+    Drop the cached bill of an order. Call after committing a status change.
+
+    Args:
+        bill_id (str): The bill ID of the order
+    """
+    _bill_cache.invalidate(bill_id)
+
+
+def get_bill_cache_stats():
+    """
+    Get hit/miss statistics of the rendered bill cache.
+
+    Returns:
+        dict: Cache statistics
+    """
+    return _bill_cache.stats()
@@ -0,0 +1,136 @@
+# Cache module
+# Thread-safe in-process cache with per-entry time-to-live and least-recently-used eviction
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire `ttl` seconds after they were stored.
+    When full, the least recently used entry is evicted.
+
+    The cache lives in the memory of one process: writers must call
+    invalidate() after committing a change that affects a cached value, and
+    the TTL bounds how stale a value can get if another process changes the
+    database.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a value computed from data read before
+        # an invalidation is not stored after it
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key, default=None):
+        """
+        Get a cached value, marking it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value to return if the key is missing or expired
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            generation (int): If given, only store when no invalidation happened since
+                generation() returned this number
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def generation(self):
+        """Get the invalidation counter, to pass to set() after computing a value."""
+        with self._lock:
+            return self._generation
+
+    def get_or_compute(self, key, compute):
+        """
+        Get a cached value, or compute, cache and return it.
+
+        Args:
+            key: Cache key
+            compute (callable): Function without arguments returning the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self.generation()
+        value = compute()
+        self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key):
+        """Remove one entry (a no-op if it is not cached)."""
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """
+        Remove every entry whose key matches predicate (walks all entries).
+
+        Args:
+            predicate (callable): Function taking a key and returning True to remove it
+        """
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache usage statistics.
+
+        Returns:
+            dict: hits, misses, evictions, invalidations, size and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
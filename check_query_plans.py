@@ -0,0 +1,201 @@
+# Query plan check module
+# Runs every API route of main.py against a seeded throwaway database, records each SQL
+# statement the routes execute and fails if EXPLAIN QUERY PLAN shows a full scan of a large table.
+#
+# Usage:
+#   python check_query_plans.py [--orders 20000] [--verbose]
+#
+# Exit status 0 when every plan uses an index, 1 otherwise (suitable for CI).
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+import benchmark
+import db
+
+# Tables that grow with the business; a SCAN of any of them fails the check
+LARGE_TABLES = {'orders', 'order_items', 'cart', 'addresses', 'customers'}
+
+# Routes whose whole point is to read every row (full-history exports); their scans are expected
+FULL_EXPORT_ROUTES = {'owner: export all orders', 'owner: all orders as NDJSON', 'owner: all-time report as NDJSON'}
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)( USING (COVERING )?INDEX)?')
+
+
+def _seed_customer_rows(customer_ids):
+    """Give every seeded customer a saved address and a cart, so those tables are not empty."""
+    conn = db.get_connection()
+    try:
+        conn.executemany('''
+            INSERT INTO addresses (customer_id, full_name, phone, address_line1, pincode, is_default)
+            VALUES (?, 'Customer', '9876543210', 'Address line', '400001', 1)
+        ''', [(customer_id,) for customer_id in customer_ids])
+        conn.executemany('''
+            INSERT INTO cart (customer_id, item_name, quantity, unit_price, total_price)
+            VALUES (?, 'Shirt', 1, 15, 15)
+        ''', [(customer_id,) for customer_id in customer_ids])
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+
+
+def exercise_routes(app, bill_id):
+    """
+    Call every data-backed route once as a customer and as the owner.
+
+    Args:
+        app (Flask): The application
+        bill_id (str): A seeded bill ID to look up
+
+    Yields:
+        str: Label of the route about to be called; statements traced until the next label belong to it
+    """
+    customer = app.test_client()
+    owner = app.test_client()
+
+    yield 'customer: sign up'
+    customer.post('/signup', json={'name': 'Plan Check', 'username': 'plan@example.com',
+                                   'phone': '9876543210', 'password': 'secret1'})
+    yield 'customer: log in'
+    customer.post('/login', data={'authOption': 'login', 'loginEmail': 'plan@example.com',
+                                  'loginPassword': 'secret1'})
+    yield 'customer: add to cart'
+    customer.post('/api/cart/add', json={'item_name': 'Shirt', 'quantity': 2})
+    yield 'customer: cart items'
+    customer.get('/api/cart/items')
+    yield 'customer: remove from cart'
+    customer.delete('/api/cart/remove/Shirt')
+    customer.post('/api/cart/add', json={'item_name': 'Pant', 'quantity': 1})
+    yield 'customer: cart batch'
+    customer.post('/api/cart/batch', json={'operations': [{'op': 'add', 'item_name': 'Suit', 'quantity': 1},
+                                                          {'op': 'set', 'item_name': 'Suit', 'quantity': 2},
+                                                          {'op': 'remove', 'item_name': 'Suit'}]})
+    yield 'customer: pickup dates'
+    customer.get('/api/cart/pickup-dates')
+    yield 'customer: add address'
+    customer.post('/api/addresses', json={'full_name': 'Plan Check', 'phone': '9876543210',
+                                          'address_line1': 'Line 1', 'city': 'Mumbai', 'state': 'Maharashtra',
+                                          'pincode': '400001', 'is_default': True})
+    yield 'customer: addresses'
+    address_id = customer.get('/api/addresses').get_json()['addresses'][0]['id']
+    yield 'customer: default address'
+    customer.get('/api/addresses/default')
+    yield 'customer: update address'
+    customer.put(f'/api/addresses/{address_id}', json={'landmark': 'Near the park'})
+    yield 'customer: set default address'
+    customer.put(f'/api/addresses/{address_id}/default')
+    yield 'customer: place order'
+    placed = customer.post('/api/cart/place-order', json={'pickup_date': '10-03-2026', 'pickup_address': 'a',
+                                                          'delivery_address': 'b'}).get_json()
+    own_bill_id = placed['order_details']['bill_id']
+    yield 'customer: orders'
+    customer.get('/api/customer/orders')
+    yield 'customer: orders of a month'
+    customer.get('/api/customer/orders?month=3&year=2026')
+    yield 'customer: order details'
+    customer.get(f'/api/customer/order/{own_bill_id}')
+    yield 'customer: stats'
+    customer.get('/api/customer/stats')
+    yield 'customer: bill'
+    customer.get(f'/api/generate-bill/{own_bill_id}')
+    yield 'customer: cancel order'
+    customer.post(f'/api/cancel-order/{own_bill_id}')
+    yield 'customer: delete address'
+    customer.delete(f'/api/addresses/{address_id}')
+
+    yield 'owner: log in'
+    owner.post('/login', data={'authOption': 'ownlogin', 'ownuser': 'admin', 'OwnPassword': 'password123'})
+    yield 'owner: orders page'
+    next_cursor = owner.get('/api/orders').get_json()['next_cursor']
+    yield 'owner: next orders page'
+    owner.get(f'/api/orders?cursor={next_cursor}')
+    yield 'owner: orders page by status'
+    owner.get('/api/orders?status=Delivered')
+    yield 'owner: all orders as NDJSON'
+    owner.get('/api/orders?format=ndjson').get_data()
+    yield 'owner: order details'
+    owner.get(f'/api/order/{bill_id}')
+    yield 'owner: update status'
+    owner.put(f'/api/order/{bill_id}/status', json={'status': 'Delivered'})
+    yield 'owner: all-time report'
+    owner.get('/monthly_report')
+    yield 'owner: monthly report'
+    owner.get('/monthly_report?month=3&year=2026&page=2')
+    yield 'owner: yearly report'
+    owner.get('/monthly_report?year=2026')
+    yield 'owner: all-time report as NDJSON'
+    owner.get('/monthly_report?format=ndjson').get_data()
+    yield 'owner: export a month'
+    owner.get('/api/export/orders?from=01-03-2026&to=31-03-2026').get_data()
+    yield 'owner: export all orders'
+    owner.get('/api/export/orders').get_data()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that API route queries use indexes')
+    parser.add_argument('--orders', type=int, default=20000, help='orders to seed')
+    parser.add_argument('--verbose', action='store_true', help='print the plan of every statement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = os.path.join(tmp_dir, 'plans.sqlite')
+        customer_ids = benchmark.seed_database(db_file, customers=200, orders=args.orders)
+        _seed_customer_rows(customer_ids)
+
+        statements = []
+        db.configure(db_file, trace_callback=statements.append)
+
+        import main as app_module
+
+        # statement -> label of the first route that ran it
+        routes = {}
+        current_route = 'app startup'
+        for next_route in exercise_routes(app_module.app, 'B001'):
+            for statement in statements:
+                routes.setdefault(statement, current_route)
+            statements.clear()
+            current_route = next_route
+        for statement in statements:
+            routes.setdefault(statement, current_route)
+
+        explain = sqlite3.connect(db_file)
+        failures = 0
+        checked = 0
+        for statement, route in routes.items():
+            text = statement.strip()
+            # Skip transaction control, PRAGMAs and the statements inside triggers
+            if not re.match(r'(SELECT|INSERT|UPDATE|DELETE|WITH)\b', text, re.IGNORECASE):
+                continue
+
+            plan = [row[3] for row in explain.execute(f'EXPLAIN QUERY PLAN {text}')]
+            checked += 1
+            # An index walked in order under a LIMIT stops after one page, so only that is allowed
+            limited = re.search(r'\bLIMIT\b', text, re.IGNORECASE)
+            scans = []
+            for step in plan:
+                match = SCAN_PATTERN.match(step)
+                if match and match.group(1) in LARGE_TABLES and not (match.group(2) and limited):
+                    scans.append(step)
+            failed = scans and route not in FULL_EXPORT_ROUTES
+
+            if failed or args.verbose:
+                status = 'FAIL' if failed else 'ok'
+                print(f"[{status}] {route}: {' '.join(text.split())[:160]}")
+                for step in plan:
+                    print(f"         {step}")
+            failures += bool(failed)
+
+        explain.close()
+        db.close_pool()
+
+    print(f"query plans: {checked} statements checked, {failures} full scans of large tables")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# Compression module
+# Flask-compatible response compression: negotiated gzip (or brotli, if installed) for HTML,
+# JSON, NDJSON and CSV bodies, plus page templates compressed once at startup
+
+import gzip
+import zlib
+
+from flask import Response, current_app, render_template, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this many bytes are sent as they are: compressing them saves
+# less than the CPU time and the Content-Encoding header cost
+COMPRESSION_MIN_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+}
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# template name -> {encoding: body}, where the identity encoding is ''
+_precompressed = {}
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into the quality of each coding.
+
+    Args:
+        header (str): Header value, e.g. 'gzip;q=0.8, br, *;q=0'
+
+    Returns:
+        dict: Lowercase coding (or '*') -> q-value; codings with a malformed q-value are left out
+    """
+    qualities = {}
+    for part in header.split(','):
+        coding, *params = [token.strip() for token in part.split(';')]
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = None
+        if quality is not None:
+            qualities[coding.lower()] = quality
+    return qualities
+
+
+def choose_encoding():
+    """
+    Pick the content encoding for the current request from its Accept-Encoding header:
+    the supported coding with the highest q-value, brotli on a tie. A coding with
+    q=0 (explicitly or through '*;q=0') is never used.
+
+    Returns:
+        str: 'br' or 'gzip', or None to send the body uncompressed
+    """
+    qualities = parse_accept_encoding(request.headers.get('Accept-Encoding', ''))
+    supported = (['br'] if brotli is not None else []) + ['gzip']
+
+    best, best_quality = None, 0
+    for encoding in supported:
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """
+    Compress a whole body.
+
+    Args:
+        data (bytes): Body to compress
+        encoding (str): 'br' or 'gzip'
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_stream(chunks, encoding):
+    # Chunks are fed to one compressor and output is yielded as the compressor produces it,
+    # so a streamed body stays streamed (and in bounded memory) when compressed
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress_chunk, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress_chunk, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        output = compress_chunk(chunk)
+        if output:
+            yield output
+    yield finish()
+
+
+def compress_response(response):
+    """
+    Compress a response for the current request if it is worth it (after_request handler).
+
+    Args:
+        response (Response): The response about to be sent
+
+    Returns:
+        Response: The same response, possibly with a compressed body
+    """
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ from the identity ones, so a strong ETag would be wrong
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def precompress_templates(app, names):
+    """
+    Render page templates that take no context once, and keep them compressed with
+    every available encoding. Skipped in debug mode, where templates reload from disk.
+
+    Args:
+        app (Flask): The Flask application
+        names (iterable): Template names
+    """
+    if app.debug:
+        return
+
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    with app.test_request_context('/'):
+        for name in names:
+            body = render_template(name).encode('utf-8')
+            variants = {'': body}
+            for encoding in encodings:
+                variants[encoding] = compress(body, encoding)
+            _precompressed[name] = variants
+
+
+def template_response(name):
+    """
+    Serve a page template, from its precompressed copy when there is one
+    (never in debug mode, so edited templates show up on reload).
+
+    Args:
+        name (str): Template name
+
+    Returns:
+        Response: HTML response
+    """
+    variants = _precompressed.get(name)
+    if variants is None or current_app.debug:
+        return Response(render_template(name), mimetype='text/html')
+
+    encoding = choose_encoding()
+    response = Response(variants[encoding or ''], mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """
+    Register response compression with a Flask app.
+
+    Args:
+        app (Flask): The Flask application
+    """
+    app.after_request(compress_response)
@@ -0,0 +1,362 @@
+# Database connection module
+# Shared, thread-aware SQLite connection pool used by all data modules
+
+import random
+import sqlite3
+import threading
+import time
+from flask import g, has_app_context
+
+# Database file name
+DB_FILE = 'customer_db.sqlite'
+
+# Maximum number of idle connections kept open for reuse
+POOL_SIZE = 8
+
+# Retries of a write transaction that finds the database locked, and the first
+# backoff delay in seconds (doubled on every retry, with jitter)
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# Storage profile: PRAGMAs applied to every new connection, in order.
+# WAL lets the owner dashboard read while customers check out, and
+# synchronous=NORMAL is durable against application crashes in WAL mode.
+STORAGE_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,             # ms to wait for a lock before SQLITE_BUSY
+    'cache_size': -16000,             # negative = KiB, so 16 MB of page cache
+    'mmap_size': 128 * 1024 * 1024,   # bytes of the file memory-mapped for reads
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': 1000,       # pages
+    'journal_size_limit': 64 * 1024 * 1024,
+}
+
+# The default SQLite behaviour, kept for comparison in benchmark.py
+LEGACY_STORAGE_PROFILE = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+}
+
+# Seconds between background WAL checkpoints
+CHECKPOINT_INTERVAL = 60
+
+# Rows fetched per round trip when streaming query results
+STREAM_BATCH_SIZE = 500
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections to a single database file.
+
+    Connections are created with check_same_thread=False so they can be handed
+    from one worker thread to another, but a connection is only ever used by
+    the thread that acquired it until it is released back to the pool.
+    """
+
+    def __init__(self, db_file, max_idle=POOL_SIZE, storage_profile=None, trace_callback=None):
+        self.db_file = db_file
+        self.max_idle = max_idle
+        self.storage_profile = STORAGE_PROFILE if storage_profile is None else storage_profile
+        self.trace_callback = trace_callback
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'released': 0, 'discarded': 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma, value in self.storage_profile.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        if self.trace_callback:
+            conn.set_trace_callback(self.trace_callback)
+        return conn
+
+    def acquire(self):
+        """
+        Take an idle connection from the pool, opening a new one if none is idle.
+
+        Returns:
+            sqlite3.Connection: Connection with sqlite3.Row as row factory
+        """
+        with self._lock:
+            if self._idle:
+                self._stats['hits'] += 1
+                return self._idle.pop()
+            self._stats['misses'] += 1
+        return self._connect()
+
+    def release(self, conn):
+        """
+        Return a connection to the pool. Any uncommitted work is rolled back.
+
+        Args:
+            conn (sqlite3.Connection): Connection previously returned by acquire()
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                self._stats['released'] += 1
+                return
+            self._stats['discarded'] += 1
+        conn.close()
+
+    def close_all(self):
+        """Close every idle connection held by the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """
+        Get pool usage statistics.
+
+        Returns:
+            dict: hits, misses, released, discarded, idle and hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / requests, 4) if requests else 0.0
+        return stats
+
+
+_pool = ConnectionPool(DB_FILE)
+
+
+def configure(db_file, max_idle=POOL_SIZE, storage_profile=None, trace_callback=None):
+    """
+    Point the shared pool at a different database file or storage profile
+    (used by scripts and benchmarks).
+
+    Args:
+        db_file (str): Path of the SQLite database file
+        max_idle (int): Maximum number of idle connections to keep
+        storage_profile (dict): PRAGMAs for new connections (default: STORAGE_PROFILE)
+        trace_callback (callable): Called with the text of every statement run (see
+            sqlite3.Connection.set_trace_callback), e.g. to collect queries for plan checks
+    """
+    global _pool, DB_FILE
+    _pool.close_all()
+    DB_FILE = db_file
+    _pool = ConnectionPool(db_file, max_idle, storage_profile, trace_callback)
+
+
+def close_pool():
+    """Close every idle connection in the shared pool."""
+    _pool.close_all()
+
+
+def get_connection():
+    """
+    Get a database connection.
+
+    Inside a Flask app context the connection is bound to `g` so every data
+    module called while handling a request shares one connection. Outside of
+    an app context a connection is taken from the pool and must be handed
+    back with release_connection().
+
+    Returns:
+        sqlite3.Connection: Connection with sqlite3.Row as row factory
+    """
+    if has_app_context():
+        conn = g.get('_db_conn')
+        if conn is None:
+            conn = _pool.acquire()
+            g._db_conn = conn
+        return conn
+    return _pool.acquire()
+
+
+def release_connection(conn):
+    """
+    Release a connection obtained from get_connection().
+
+    The request-bound connection stays open until the app context is torn
+    down; uncommitted work is rolled back just as closing it would.
+
+    Args:
+        conn (sqlite3.Connection): Connection to release
+    """
+    if has_app_context() and g.get('_db_conn') is conn:
+        if conn.in_transaction:
+            conn.rollback()
+        return
+    _pool.release(conn)
+
+
+def is_busy_error(error):
+    """
+    Check whether an sqlite3 error means the database is locked by another writer.
+
+    Args:
+        error (sqlite3.Error): The error raised by sqlite3
+
+    Returns:
+        bool: True for SQLITE_BUSY / SQLITE_LOCKED errors
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    if getattr(error, 'sqlite_errorname', None) in ('SQLITE_BUSY', 'SQLITE_LOCKED'):
+        return True
+    return 'database is locked' in str(error)
+
+
+def run_in_transaction(func, *args, retries=BUSY_RETRIES):
+    """
+    Run func(conn, *args) inside one BEGIN IMMEDIATE ... COMMIT write transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so nothing can change the
+    rows func reads before it writes. If the database is locked by another
+    writer the transaction is rolled back and func is run again after an
+    exponential backoff. Any other error rolls back and is re-raised.
+
+    Args:
+        func (callable): Function taking the connection; its return value is returned
+        retries (int): Number of retries when the database is busy
+
+    Returns:
+        The return value of func
+    """
+    conn = get_connection()
+
+    try:
+        for attempt in range(retries + 1):
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                result = func(conn, *args)
+                conn.commit()
+                return result
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if not is_busy_error(e) or attempt == retries:
+                    raise
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+            time.sleep(BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    finally:
+        release_connection(conn)
+
+
+def iter_rows(run_query, *args, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the rows of a query in fetchmany() batches, holding at most one batch in memory.
+
+    The query runs on its own pooled connection rather than the request-bound
+    one, so the generator keeps working after the view has returned (e.g. as
+    the body of a streamed Flask response). The connection goes back to the
+    pool when the generator is exhausted or closed.
+
+    Args:
+        run_query (callable): Function taking a cursor (and *args) that executes the query
+        batch_size (int): Rows fetched per batch
+
+    Yields:
+        sqlite3.Row: One row at a time
+    """
+    conn = _pool.acquire()
+
+    try:
+        cursor = conn.cursor()
+        run_query(cursor, *args)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+        cursor.close()
+    finally:
+        _pool.release(conn)
+
+
+def checkpoint(mode='PASSIVE'):
+    """
+    Run a WAL checkpoint, copying committed pages from the -wal file back into
+    the database file.
+
+    Args:
+        mode (str): 'PASSIVE' (never blocks writers), 'FULL', 'RESTART' or 'TRUNCATE'
+
+    Returns:
+        dict: busy flag, pages in the WAL and pages checkpointed
+    """
+    if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f'Invalid checkpoint mode: {mode}')
+
+    conn = _pool.acquire()
+
+    try:
+        busy, log_pages, checkpointed_pages = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    finally:
+        _pool.release(conn)
+
+    return {'busy': busy, 'log_pages': log_pages, 'checkpointed_pages': checkpointed_pages}
+
+
+def _checkpoint_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            result = checkpoint('PASSIVE')
+            # Once every page has been copied back, reset the WAL file so it does not keep growing
+            if not result['busy'] and result['log_pages'] == result['checkpointed_pages']:
+                checkpoint('TRUNCATE')
+        except sqlite3.Error as e:
+            print(f"Checkpoint error: {e}")
+
+
+def start_checkpointer(interval=CHECKPOINT_INTERVAL):
+    """
+    Start a daemon thread that checkpoints the WAL every `interval` seconds.
+    Does nothing unless the storage profile uses WAL.
+
+    Args:
+        interval (float): Seconds between checkpoints
+    """
+    if str(_pool.storage_profile.get('journal_mode', '')).upper() != 'WAL':
+        return
+    threading.Thread(target=_checkpoint_loop, args=(interval,), name='wal-checkpointer', daemon=True).start()
+
+
+def close_request_connection(exception=None):
+    """Return the request-bound connection to the pool (Flask teardown handler)."""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        _pool.release(conn)
+
+
+def init_app(app):
+    """
+    Register the per-request connection teardown with a Flask app and start
+    the background WAL checkpointer.
+
+    Args:
+        app (Flask): The Flask application
+    """
+    app.teardown_appcontext(close_request_connection)
+    start_checkpointer()
+
+
+def pool_stats():
+    """
+    Get statistics for the shared connection pool.
+
+    Returns:
+        dict: Pool hit/miss statistics
+    """
+    return _pool.stats()
@@ -0,0 +1,100 @@
+# Delivery slot scheduler module
+# Per-day delivery capacity buckets used to assign delivery dates to new orders
+#
+# The delivery_slots table holds one row per delivery date with the number of
+# active (not Delivered or Cancelled) orders due that day. It is maintained by
+# triggers on the orders table, so a bucket is filled when an order is placed and
+# released as soon as OwnerSOD.update_delivery_status (or a customer
+# cancellation) moves the order to Delivered or Cancelled.
+
+from datetime import timedelta
+
+import db
+
+# Maximum number of orders that can be delivered on one day
+DAILY_DELIVERY_CAPACITY = 5
+
+# Earliest delivery is this many days after pickup
+MIN_TURNAROUND_DAYS = 1
+
+
+def find_delivery_date(conn, pickup_date):
+    """
+    Find the earliest delivery day after pickup that still has free capacity.
+
+    Uses one seek on the delivery_slots primary key (O(log n)) and then walks
+    only the run of consecutive full days directly after the earliest
+    possible delivery date.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read the buckets with; pass the
+            connection of the write transaction that will insert the order
+        pickup_date (date): Pickup date
+
+    Returns:
+        date: Assigned delivery date
+    """
+    candidate = pickup_date + timedelta(days=MIN_TURNAROUND_DAYS)
+
+    cursor = conn.execute('''
+        SELECT slot_date FROM delivery_slots
+        WHERE slot_date >= ? AND booked >= ?
+        ORDER BY slot_date
+    ''', (candidate.isoformat(), DAILY_DELIVERY_CAPACITY))
+
+    for row in cursor:
+        if row['slot_date'] != candidate.isoformat():
+            break
+        candidate += timedelta(days=1)
+    cursor.close()
+
+    return candidate
+
+
+def get_remaining_capacity(dates):
+    """
+    Get the remaining delivery capacity for each of the given days.
+
+    Args:
+        dates (list): List of date objects
+
+    Returns:
+        dict: Mapping of date to number of free delivery slots on that day
+    """
+    if not dates:
+        return {}
+
+    conn = db.get_connection()
+
+    try:
+        rows = conn.execute('''
+            SELECT slot_date, booked FROM delivery_slots
+            WHERE slot_date >= ? AND slot_date <= ?
+        ''', (min(dates).isoformat(), max(dates).isoformat())).fetchall()
+    finally:
+        db.release_connection(conn)
+
+    booked = {row['slot_date']: row['booked'] for row in rows}
+    return {day: max(DAILY_DELIVERY_CAPACITY - booked.get(day.isoformat(), 0), 0) for day in dates}
+
+
+def get_delivery_options(pickup_dates):
+    """
+    Get the delivery date a new order would be assigned for each pickup date,
+    with the remaining capacity of that delivery day.
+
+    Args:
+        pickup_dates (list): List of date objects
+
+    Returns:
+        dict: Mapping of pickup date to (delivery date, free delivery slots on that day)
+    """
+    conn = db.get_connection()
+
+    try:
+        delivery_dates = {pickup: find_delivery_date(conn, pickup) for pickup in pickup_dates}
+    finally:
+        db.release_connection(conn)
+
+    remaining = get_remaining_capacity(sorted(set(delivery_dates.values())))
+    return {pickup: (delivery, remaining[delivery]) for pickup, delivery in delivery_dates.items()}
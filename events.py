@@ -0,0 +1,225 @@
+# Event bus module
+# In-process publish/subscribe bus that pushes order status changes to customers over Server-Sent Events
+
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
+# Events a subscriber may fall behind by before it is disconnected (it reconnects and catches up)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Recent events kept per topic, replayed to a client reconnecting with Last-Event-ID,
+# for at most this many of the most recently active topics
+EVENT_HISTORY_SIZE = 50
+HISTORY_TOPICS = 1024
+
+# Seconds between SSE comment lines on an idle stream, so proxies keep it open and a
+# client that went away is noticed
+HEARTBEAT_INTERVAL = 15
+
+# Milliseconds the browser waits before reconnecting a dropped stream
+RECONNECT_DELAY = 3000
+
+# Event telling the client its view may have missed changes and must be reloaded
+RESYNC_EVENT = 'resync'
+
+# Event IDs look like '<boot id>-<sequence>', so IDs from before a restart are recognised as stale
+_BOOT_ID = os.urandom(4).hex()
+
+
+class Subscription:
+    """One client's bounded queue of events for one topic."""
+
+    def __init__(self, topic, max_size):
+        self.topic = topic
+        self.overflowed = False
+        self._queue = queue.Queue(max_size)
+
+    def put(self, event):
+        """Queue an event without blocking; marks the subscription overflowed if it is full."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float): Seconds to wait
+
+        Returns:
+            dict: The event, or None if none arrived in time
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """
+    Thread-safe publish/subscribe bus. Events are dicts with id, type and data.
+
+    The bus lives in the memory of one process: only changes made through
+    this process are published, and a restart is answered with a resync
+    event rather than a replay.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE, history_size=EVENT_HISTORY_SIZE,
+                 history_topics=HISTORY_TOPICS):
+        self.queue_size = queue_size
+        self.history_size = history_size
+        self.history_topics = history_topics
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._subscribers = {}
+        self._history = OrderedDict()
+        # Sequence of the newest event in any history evicted so far: a client that
+        # last saw an older event may have missed events of an evicted topic
+        self._evicted_sequence = 0
+
+    def publish(self, topic, event_type, data):
+        """
+        Send an event to every current subscriber of a topic and keep it for replay.
+
+        Args:
+            topic: Topic key, e.g. a customer ID
+            event_type (str): SSE event name
+            data (dict): JSON-serialisable payload
+
+        Returns:
+            str: The event ID
+        """
+        with self._lock:
+            self._sequence += 1
+            event = {'id': f'{_BOOT_ID}-{self._sequence}', 'type': event_type, 'data': data}
+            history = self._history.get(topic)
+            if history is None:
+                history = self._history[topic] = deque(maxlen=self.history_size)
+                if len(self._history) > self.history_topics:
+                    _, evicted = self._history.popitem(last=False)
+                    self._evicted_sequence = max(self._evicted_sequence, _sequence_of(evicted[-1]))
+            self._history.move_to_end(topic)
+            history.append(event)
+            for subscription in self._subscribers.get(topic, ()):
+                subscription.put(event)
+        return event['id']
+
+    def subscribe(self, topic, last_event_id=None):
+        """
+        Subscribe to a topic. A reconnecting client passes the ID of the last event it
+        received and first gets the events it missed, or a resync event if they are
+        no longer known (too old, or from before a restart).
+
+        Args:
+            topic: Topic key
+            last_event_id (str): Value of the Last-Event-ID header, if any
+
+        Returns:
+            Subscription: The new subscription; call unsubscribe() when done
+        """
+        subscription = Subscription(topic, self.queue_size)
+
+        with self._lock:
+            if last_event_id:
+                for event in self._missed_events(topic, last_event_id):
+                    subscription.put(event)
+            self._subscribers.setdefault(topic, set()).add(subscription)
+
+        return subscription
+
+    def _missed_events(self, topic, last_event_id):
+        boot_id, _, sequence = last_event_id.partition('-')
+
+        if boot_id == _BOOT_ID and sequence.isdigit():
+            sequence = int(sequence)
+            history = self._history.get(topic)
+
+            # The history holds every event of the topic after the client's one if it reaches
+            # back to it, or if it never dropped an event (is not full) and no history evicted
+            # since the client's event could have held events of this topic
+            not_evicted = sequence >= self._evicted_sequence
+            if history is None:
+                if not_evicted:
+                    return []
+            elif _sequence_of(history[0]) <= sequence or (len(history) < self.history_size and not_evicted):
+                return [event for event in history if _sequence_of(event) > sequence]
+
+        # The resync event carries the current sequence, so a client reconnecting
+        # after it is only sent what happened since
+        return [{'id': f'{_BOOT_ID}-{self._sequence}', 'type': RESYNC_EVENT, 'data': {}}]
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription (a no-op if it was already removed)."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def stream(self, subscription, heartbeat_interval=HEARTBEAT_INTERVAL):
+        """
+        Produce the SSE body for a subscription until the client disconnects or falls too
+        far behind; the subscription is removed either way.
+
+        Args:
+            subscription (Subscription): Subscription from subscribe()
+            heartbeat_interval (float): Seconds between heartbeats on an idle stream
+
+        Yields:
+            str: SSE text
+        """
+        try:
+            yield f'retry: {RECONNECT_DELAY}\n\n'
+            while not subscription.overflowed:
+                event = subscription.get(heartbeat_interval)
+                if event is None:
+                    yield ': heartbeat\n\n'
+                else:
+                    yield format_sse(event)
+        finally:
+            self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        """Get the number of open subscriptions across all topics."""
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+bus = EventBus()
+
+
+def _sequence_of(event):
+    return int(event['id'].rsplit('-', 1)[1])
+
+
+def format_sse(event):
+    """
+    Format an event as a Server-Sent Events message.
+
+    Args:
+        event (dict): Event with id, type and data
+
+    Returns:
+        str: SSE message text
+    """
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def publish_order_status(customer_id, bill_id, status, cancelled_by=None):
+    """
+    Tell a customer's open pages that one of their orders changed status.
+
+    Args:
+        customer_id (str): Customer who owns the order
+        bill_id (str): The bill ID of the order
+        status (str): New delivery status
+        cancelled_by (str): Who cancelled the order, for cancellations
+    """
+    bus.publish(customer_id, 'order_status',
+                {'bill_id': bill_id, 'delivery_status': status, 'cancelled_by': cancelled_by})
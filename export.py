@@ -0,0 +1,248 @@
+# Order export module
+# Flask-compatible module for bulk exporting orders joined with their items to CSV or Parquet
+#
+# Usage:
+#   python export.py orders.csv [--from 01-01-2026] [--to 31-12-2026]
+#   python export.py orders.parquet --from 01-04-2026 --to 30-04-2026   (needs pyarrow)
+
+import argparse
+import csv
+import io
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import db
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+# Rows read from the database per fetchmany() batch, and written per CSV chunk / Parquet row group
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# Output columns, one row per order item (orders without items get one row with empty item fields)
+EXPORT_COLUMNS = [
+    'bill_id', 'customer_id', 'customer_name', 'pickup_address', 'delivery_address',
+    'order_pickup_date', 'order_delivery_date', 'delivery_status', 'bill_amount',
+    'item_name', 'quantity', 'unit_price', 'total_price'
+]
+
+
+def parquet_available():
+    """Check whether pyarrow is installed, which Parquet export needs."""
+    return pyarrow is not None
+
+
+def parse_date_range(from_date=None, to_date=None):
+    """
+    Convert an inclusive DD-MM-YYYY date range into ISO delivery date bounds.
+
+    Args:
+        from_date (str): First delivery date (DD-MM-YYYY), or None for no lower bound
+        to_date (str): Last delivery date (DD-MM-YYYY), or None for no upper bound
+
+    Returns:
+        tuple: (start, end) ISO dates, start inclusive and end exclusive, either may be None
+
+    Raises:
+        ValueError: If a date is not a valid DD-MM-YYYY date
+    """
+    start = datetime.strptime(from_date, '%d-%m-%Y').date().isoformat() if from_date else None
+    end = None
+    if to_date:
+        end = (datetime.strptime(to_date, '%d-%m-%Y').date() + timedelta(days=1)).isoformat()
+    return start, end
+
+
+def _query_export_rows(cursor, start=None, end=None):
+    conditions = []
+    params = []
+
+    if start:
+        conditions.append('o.delivery_date_iso >= ?')
+        params.append(start)
+    if end:
+        conditions.append('o.delivery_date_iso < ?')
+        params.append(end)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    # Orders come off the delivery date index in order and each order's items off the
+    # order_items(bill_id) index, so the join needs no sort or temporary table
+    return cursor.execute(f'''
+        SELECT o.bill_id, o.customer_id, o.customer_name, o.pickup_address, o.delivery_address,
+               o.order_pickup_date, o.order_delivery_date, o.delivery_status, o.bill_amount,
+               oi.item_name, oi.quantity, oi.unit_price, oi.total_price
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.bill_id = o.bill_id
+        {where}
+        ORDER BY o.delivery_date_iso, o.bill_id
+    ''', params)
+
+
+def iter_export_batches(start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Read the export rows for a delivery date range in fetchmany() batches.
+
+    Args:
+        start (str): ISO start date (inclusive), or None
+        end (str): ISO end date (exclusive), or None
+        batch_size (int): Rows per batch
+
+    Yields:
+        list: Up to batch_size tuples in EXPORT_COLUMNS order
+    """
+    batch = []
+    for row in db.iter_rows(_query_export_rows, start, end, batch_size=batch_size):
+        batch.append(tuple(row))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv_chunks(start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Produce the CSV export as text chunks (header first, then one chunk per batch),
+    suitable as the body of a streamed response.
+
+    Yields:
+        str: CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for batch in iter_export_batches(start, end, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _parquet_schema():
+    return pyarrow.schema([
+        ('bill_id', pyarrow.string()),
+        ('customer_id', pyarrow.string()),
+        ('customer_name', pyarrow.string()),
+        ('pickup_address', pyarrow.string()),
+        ('delivery_address', pyarrow.string()),
+        ('order_pickup_date', pyarrow.string()),
+        ('order_delivery_date', pyarrow.string()),
+        ('delivery_status', pyarrow.string()),
+        ('bill_amount', pyarrow.float64()),
+        ('item_name', pyarrow.string()),
+        ('quantity', pyarrow.int64()),
+        ('unit_price', pyarrow.float64()),
+        ('total_price', pyarrow.float64()),
+    ])
+
+
+def write_csv(file, start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write the CSV export to an open text file.
+
+    Returns:
+        int: Number of data rows written
+    """
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+
+    rows = 0
+    for batch in iter_export_batches(start, end, batch_size):
+        writer.writerows(batch)
+        rows += len(batch)
+    return rows
+
+
+def write_parquet(file, start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write the Parquet export to a path or open binary file, one row group per batch.
+
+    Returns:
+        int: Number of data rows written
+    """
+    schema = _parquet_schema()
+    rows = 0
+
+    with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+        for batch in iter_export_batches(start, end, batch_size):
+            columns = list(zip(*batch))
+            writer.write_batch(pyarrow.record_batch(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows += len(batch)
+    return rows
+
+
+def export_orders(path, from_date=None, to_date=None, fmt=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Export orders joined with their items for a delivery date range to a file.
+
+    Args:
+        path (str): Output file path
+        from_date (str): First delivery date (DD-MM-YYYY), or None
+        to_date (str): Last delivery date (DD-MM-YYYY), or None
+        fmt (str): 'csv' or 'parquet'; taken from the file extension if None
+        batch_size (int): Rows per fetchmany() batch
+
+    Returns:
+        dict: Dictionary with success status, message, rows written and rows_per_second
+    """
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return {'success': False, 'message': f'Unsupported export format: {fmt}'}
+    if fmt == 'parquet' and not parquet_available():
+        return {'success': False, 'message': 'Parquet export requires pyarrow (pip install pyarrow)'}
+
+    try:
+        start, end = parse_date_range(from_date, to_date)
+    except ValueError:
+        return {'success': False, 'message': 'Invalid date. Use DD-MM-YYYY'}
+
+    try:
+        started = time.perf_counter()
+        if fmt == 'parquet':
+            rows = write_parquet(path, start, end, batch_size)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                rows = write_csv(file, start, end, batch_size)
+        elapsed = time.perf_counter() - started
+
+        return {
+            'success': True,
+            'message': f'Exported {rows} rows to {path}',
+            'rows': rows,
+            'rows_per_second': round(rows / elapsed) if elapsed else rows
+        }
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return {'success': False, 'message': 'Failed to export orders'}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export orders and their items to CSV or Parquet')
+    parser.add_argument('path', help='output file (.csv or .parquet)')
+    parser.add_argument('--from', dest='from_date', help='first delivery date, DD-MM-YYYY')
+    parser.add_argument('--to', dest='to_date', help='last delivery date, DD-MM-YYYY')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help='output format (default: from extension)')
+    args = parser.parse_args()
+
+    import schema
+    schema.migrate()
+    result = export_orders(args.path, args.from_date, args.to_date, args.format)
+    if not result['success']:
+        sys.exit(result['message'])
+    print(f"{result['message']} ({result['rows_per_second']} rows/s)")
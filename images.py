@@ -0,0 +1,246 @@
+# Image pipeline module
+# Flask-compatible build step for static images: content-hashed copies that can be cached forever,
+# plus resized WebP/AVIF variants when Pillow is installed, and template helpers to link them
+#
+# Usage:
+#   python images.py            (also run at app startup; only new or changed images are processed)
+
+import hashlib
+import os
+import shutil
+
+from flask import request, url_for
+from markupsafe import Markup
+
+try:
+    from PIL import Image, features
+except ImportError:  # Resized WebP/AVIF variants need Pillow; hashed copies do not
+    Image = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Images under static/SOURCE_DIR are built into static/BUILD_DIR
+SOURCE_DIR = 'images'
+BUILD_DIR = 'build'
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Variant widths in pixels; an image is never scaled up, so smaller images get their own width only
+IMAGE_WIDTHS = (640, 1280, 1920)
+
+# Encoder quality per variant format (AVIF is only produced if Pillow was built with it)
+VARIANT_QUALITY = {'avif': 55, 'webp': 80}
+
+# Fingerprinted files never change, so browsers may keep them for a year without revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+MIMETYPES = {
+    '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
+    '.gif': 'image/gif', '.webp': 'image/webp', '.avif': 'image/avif',
+}
+
+# 'images/output.jpg' -> {'original': 'build/images/output.<hash>.jpg', 'variants': {'webp': {640: path, ...}}}
+_manifest = {}
+
+
+def variant_formats():
+    """
+    Get the variant formats this installation can encode.
+
+    Returns:
+        list: Subset of ['avif', 'webp'], best compression first
+    """
+    if Image is None:
+        return []
+    return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _build_variants(source_path, target_dir, stem, content_hash, formats):
+    variants = {}
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode.endswith('A') else 'RGB')
+        widths = sorted({min(width, image.width) for width in IMAGE_WIDTHS})
+
+        for fmt in formats:
+            variants[fmt] = {}
+            for width in widths:
+                filename = f'{stem}.{content_hash}.{width}.{fmt}'
+                target = os.path.join(target_dir, filename)
+                if not os.path.exists(target):
+                    height = round(image.height * width / image.width)
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                    resized.save(target, quality=VARIANT_QUALITY[fmt])
+                variants[fmt][width] = filename
+    return variants
+
+
+def build_images(static_dir=STATIC_DIR):
+    """
+    Build the fingerprinted copy (and variants) of every source image, skipping files
+    that already exist, remove outputs of images that changed or were deleted, and
+    load the result as the manifest used by image_url() and image_set().
+
+    Args:
+        static_dir (str): The app's static folder
+
+    Returns:
+        dict: Manifest of built images
+    """
+    source_dir = os.path.join(static_dir, SOURCE_DIR)
+    target_dir = os.path.join(static_dir, BUILD_DIR, SOURCE_DIR)
+    os.makedirs(target_dir, exist_ok=True)
+    formats = variant_formats()
+
+    manifest = {}
+    for name in sorted(os.listdir(source_dir)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+
+        source_path = os.path.join(source_dir, name)
+        content_hash = _content_hash(source_path)
+
+        original = f'{stem}.{content_hash}{extension.lower()}'
+        if not os.path.exists(os.path.join(target_dir, original)):
+            shutil.copyfile(source_path, os.path.join(target_dir, original))
+
+        variants = _build_variants(source_path, target_dir, stem, content_hash, formats) if formats else {}
+
+        prefix = f'{BUILD_DIR}/{SOURCE_DIR}/'
+        manifest[f'{SOURCE_DIR}/{name}'] = {
+            'original': prefix + original,
+            'variants': {fmt: {width: prefix + filename for width, filename in by_width.items()}
+                         for fmt, by_width in variants.items()},
+        }
+
+    # Anything not referenced by the manifest belongs to an old version of an image
+    built = {path.rsplit('/', 1)[1] for entry in manifest.values() for path in _entry_paths(entry)}
+    for filename in os.listdir(target_dir):
+        if filename not in built:
+            os.remove(os.path.join(target_dir, filename))
+
+    _manifest.clear()
+    _manifest.update(manifest)
+    return manifest
+
+
+def _entry_paths(entry):
+    yield entry['original']
+    for by_width in entry['variants'].values():
+        yield from by_width.values()
+
+
+def _pick_width(by_width, width):
+    # Smallest variant at least as wide as requested, or the largest there is
+    fitting = [w for w in by_width if width is not None and w >= width]
+    return by_width[min(fitting)] if fitting else by_width[max(by_width)]
+
+
+def image_url(path, width=None, fmt=None):
+    """
+    Get the URL of a static image, fingerprinted when it has been built (template helper).
+
+    Args:
+        path (str): Image path under static/, e.g. 'images/output.jpg'
+        width (int): Display width in pixels; the smallest variant at least this wide is used
+        fmt (str): 'webp' or 'avif' for a variant (falls back to the original if unavailable)
+
+    Returns:
+        str: URL of the image
+    """
+    entry = _manifest.get(path)
+    if entry is None:
+        return url_for('static', filename=path)
+
+    by_width = entry['variants'].get(fmt)
+    filename = _pick_width(by_width, width) if by_width else entry['original']
+    return url_for('static', filename=filename)
+
+
+def image_set(path, width=None):
+    """
+    Get a CSS image-set() offering every built format of an image, best first, so the
+    browser downloads the smallest one it can decode (template helper).
+
+    Args:
+        path (str): Image path under static/, e.g. 'images/output.jpg'
+        width (int): Display width in pixels
+
+    Returns:
+        Markup: CSS value for background-image
+    """
+    entry = _manifest.get(path)
+    if entry is None or not entry['variants']:
+        return Markup(f"url('{image_url(path)}')")
+
+    sources = []
+    for fmt, by_width in entry['variants'].items():
+        sources.append(f"url('{url_for('static', filename=_pick_width(by_width, width))}') type('image/{fmt}')")
+    original = entry['original']
+    sources.append(f"url('{url_for('static', filename=original)}') "
+                   f"type('{MIMETYPES[os.path.splitext(original)[1]]}')")
+    return Markup(f"image-set({', '.join(sources)})")
+
+
+def picture_sources(path, width=None):
+    """
+    Get <source> elements for a <picture>, one per built format of an image, best first;
+    the <img> inside the <picture> keeps the original as the fallback (template helper).
+
+    Args:
+        path (str): Image path under static/, e.g. 'images/output.jpg'
+        width (int): Display width in pixels
+
+    Returns:
+        Markup: HTML, empty if the image has no variants
+    """
+    entry = _manifest.get(path)
+    if entry is None:
+        return Markup('')
+
+    sources = []
+    for fmt, by_width in entry['variants'].items():
+        sources.append(f'<source type="image/{fmt}" srcset="{url_for("static", filename=_pick_width(by_width, width))}">')
+    return Markup(''.join(sources))
+
+
+def _immutable_cache_headers(response):
+    filename = (request.view_args or {}).get('filename', '')
+    if request.endpoint == 'static' and filename.startswith(f'{BUILD_DIR}/') and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    """
+    Build the static images, register image_url(), image_set() and picture_sources()
+    as template globals and mark fingerprinted files as immutable.
+
+    Args:
+        app (Flask): The Flask application
+    """
+    build_images(app.static_folder)
+    app.add_template_global(image_url)
+    app.add_template_global(image_set)
+    app.add_template_global(picture_sources)
+    app.after_request(_immutable_cache_headers)
+
+
+if __name__ == '__main__':
+    built = build_images()
+    formats = variant_formats()
+    print(f"Built {len(built)} images into static/{BUILD_DIR}/{SOURCE_DIR}"
+          f" ({', '.join(formats) + ' variants' if formats else 'no variants: pip install Pillow'})")
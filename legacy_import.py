@@ -0,0 +1,546 @@
+# Legacy CSV import module
+# Bulk loads the pre-SQLite order history (customer_orders.csv and cust_order_details.csv) into the database
+#
+# The order details file may have one row per item (bill_id, item_name, quantity, unit_price)
+# or one row per order with the items combined in an items_details column ("2x Shirt, 1x Pant"),
+# the format of the old order_details table.
+#
+# Usage:
+#   python legacy_import.py [--orders customer_orders.csv] [--items cust_order_details.csv]
+#                           [--batch-size 50000] [--restart]
+#
+# Run it while the web app is stopped. For the duration of the load the secondary
+# indexes and triggers on orders and order_items are dropped (their definitions are
+# kept in import_deferred_objects) and rebuilt once at the end, together with the
+# tables the triggers maintain. Progress is committed with every batch, so an
+# interrupted import picks up where it stopped when run again.
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+import db
+import delivery_slots
+import monthrep
+from Manipulation_of_cart_edited import ITEM_COSTS
+
+# Legacy file names used before the move to SQLite
+ORDERS_CSV = 'customer_orders.csv'
+ORDER_DETAILS_CSV = 'cust_order_details.csv'
+
+# CSV rows loaded per transaction
+IMPORT_BATCH_SIZE = 50000
+
+# Legacy orders without a customer ID are attached to this placeholder customer
+LEGACY_CUSTOMER_ID = 'legacy'
+
+# Status given to legacy orders without one; the old system only kept finished orders
+DEFAULT_STATUS = 'Delivered'
+
+VALID_STATUSES = ('Order Placed', 'Order Picked', 'In Process', 'Out for Delivery', 'Delivered', 'Cancelled')
+
+# Index of order_items by bill_id (schema migration 2), kept during the load for _replace_items()
+ITEMS_BILL_INDEX = 'idx_order_items_bill_id'
+
+# Rejected rows printed per file (all of them are counted)
+MAX_REPORTED_ERRORS = 10
+
+
+def _normalize_header(name):
+    """'Order Pickup Date' -> 'order_pickup_date', so both legacy and column-style headers work."""
+    return name.strip().lower().replace(' ', '_')
+
+
+def _parse_date(value):
+    # Sliced by hand rather than with strptime, which dominates the load time on large files
+    value = (value or '').strip()
+    try:
+        if len(value) == 10 and value[2] == '-' and value[5] == '-':
+            return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+        if len(value) == 10 and value[4] == '-' and value[7] == '-':
+            return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+    except ValueError:
+        pass
+    raise ValueError(f'invalid date {value!r}')
+
+
+def _format_date(day):
+    return f'{day.day:02d}-{day.month:02d}-{day.year:04d}'
+
+
+def _parse_amount(value, field):
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid {field} {value!r}')
+    if amount < 0:
+        raise ValueError(f'negative {field} {value!r}')
+    return round(amount, 2)
+
+
+def _require(row, field):
+    value = (row.get(field) or '').strip()
+    if not value:
+        raise ValueError(f'missing {field}')
+    return value
+
+
+def parse_order_row(row):
+    """
+    Validate one customer_orders.csv row.
+
+    Args:
+        row (dict): CSV row with normalized headers
+
+    Returns:
+        tuple: Parameters for INSERT_ORDER_SQL
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    pickup_date = _parse_date(_require(row, 'order_pickup_date'))
+    if (row.get('order_delivery_date') or '').strip():
+        delivery_date = _parse_date(row['order_delivery_date'])
+    else:
+        delivery_date = pickup_date + timedelta(days=delivery_slots.MIN_TURNAROUND_DAYS)
+
+    status = (row.get('delivery_status') or '').strip() or DEFAULT_STATUS
+    if status not in VALID_STATUSES:
+        raise ValueError(f'invalid delivery status {status!r}')
+
+    return (
+        (row.get('customer_id') or '').strip() or LEGACY_CUSTOMER_ID,
+        _require(row, 'customer_name'),
+        (row.get('pickup_address') or '').strip(),
+        (row.get('delivery_address') or '').strip(),
+        _format_date(pickup_date),
+        _format_date(delivery_date),
+        _parse_amount(row.get('bill_amount'), 'bill amount'),
+        _require(row, 'bill_id'),
+        status
+    )
+
+
+def parse_item_row(row):
+    """
+    Validate one cust_order_details.csv row.
+
+    Args:
+        row (dict): CSV row with normalized headers
+
+    Returns:
+        tuple: Parameters for INSERT_ITEM_SQL
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    bill_id = _require(row, 'bill_id')
+
+    try:
+        quantity = int(row.get('quantity'))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid quantity {row.get('quantity')!r}")
+    if quantity <= 0:
+        raise ValueError(f'quantity must be positive, got {quantity}')
+
+    unit_price = _parse_amount(row.get('unit_price'), 'unit price')
+    if (row.get('total_price') or '').strip():
+        total_price = _parse_amount(row['total_price'], 'total price')
+    else:
+        total_price = round(unit_price * quantity, 2)
+
+    return (bill_id, _require(row, 'item_name'), quantity, unit_price, total_price, bill_id)
+
+
+def parse_items_details_row(row):
+    """
+    Validate one order details row in the combined format, where items_details
+    lists the items of the order as "2x Shirt, 1x Pant". That format has no prices,
+    so each item is priced at its current ITEM_COSTS price.
+
+    Args:
+        row (dict): CSV row with normalized headers
+
+    Returns:
+        list: Parameters for INSERT_ITEM_SQL, one tuple per item
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    bill_id = _require(row, 'bill_id')
+    details = _require(row, 'items_details')
+    if details == 'No items':
+        return []
+
+    items = []
+    for entry in details.split(','):
+        quantity, _, item_name = entry.strip().partition('x ')
+        item_name = item_name.strip()
+        try:
+            quantity = int(quantity)
+        except ValueError:
+            raise ValueError(f'invalid item {entry.strip()!r}, expected e.g. "2x Shirt"')
+        if quantity <= 0:
+            raise ValueError(f'quantity must be positive, got {quantity}')
+        if item_name not in ITEM_COSTS:
+            raise ValueError(f'unknown item {item_name!r}, no price to import it with')
+
+        unit_price = ITEM_COSTS[item_name]
+        items.append((bill_id, item_name, quantity, unit_price, round(unit_price * quantity, 2), bill_id))
+    return items
+
+
+# Existing bill IDs are skipped, so re-importing the same orders is harmless
+# and an order of the live app is never overwritten
+INSERT_ORDER_SQL = '''
+    INSERT OR IGNORE INTO orders (customer_id, customer_name, pickup_address, delivery_address,
+                                  order_pickup_date, order_delivery_date, bill_amount, bill_id, delivery_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Bills whose order this import inserts; run before INSERT_ORDER_SQL in the same transaction
+RECORD_ORDER_BILL_SQL = '''
+    INSERT OR IGNORE INTO import_order_bills (bill_id)
+    SELECT ? WHERE NOT EXISTS (SELECT 1 FROM orders WHERE bill_id = ?)
+'''
+
+# Items are only loaded for orders the importer inserted; items of any other bill
+# (no order, or an order placed through the app) are skipped
+INSERT_ITEM_SQL = '''
+    INSERT INTO order_items (bill_id, item_name, quantity, unit_price, total_price)
+    SELECT ?, ?, ?, ?, ?
+    WHERE EXISTS (SELECT 1 FROM import_order_bills WHERE bill_id = ?)
+'''
+
+# source -> (insert statement, file formats); imported in this order. A file format is
+# (required columns, row parser, whether the parser returns a list of rows), and a file
+# is read with the first format whose columns it has
+SOURCES = {
+    'orders': (INSERT_ORDER_SQL, [
+        (('bill_id', 'customer_name', 'order_pickup_date', 'bill_amount'), parse_order_row, False),
+    ]),
+    'order_items': (INSERT_ITEM_SQL, [
+        (('bill_id', 'item_name', 'quantity', 'unit_price'), parse_item_row, False),
+        (('bill_id', 'items_details'), parse_items_details_row, True),
+    ]),
+}
+
+
+def defer_indexes(conn):
+    """
+    Drop the secondary indexes and triggers of orders and order_items, saving their
+    definitions in import_deferred_objects. A no-op if they are already deferred
+    (an earlier import was interrupted). The UNIQUE index on orders.bill_id and the
+    order_items(bill_id) index stay: the item load looks bills up on both.
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open write transaction
+
+    Returns:
+        int: Number of indexes and triggers dropped
+    """
+    if conn.execute('SELECT COUNT(*) FROM import_deferred_objects').fetchone()[0]:
+        return 0
+
+    objects = conn.execute('''
+        SELECT name, type, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND tbl_name IN ('orders', 'order_items') AND sql IS NOT NULL
+          AND name != ?
+    ''', (ITEMS_BILL_INDEX,)).fetchall()
+
+    for name, object_type, sql in objects:
+        conn.execute('INSERT INTO import_deferred_objects (name, type, sql) VALUES (?, ?, ?)',
+                     (name, object_type, sql))
+        conn.execute(f'DROP {object_type.upper()} IF EXISTS "{name}"')
+    return len(objects)
+
+
+def restore_deferred(conn):
+    """
+    Advance the bill ID sequence past the imported bill IDs. If defer_indexes()
+    dropped anything, recreate the indexes, rebuild the tables their triggers
+    maintain (delivery slots, monthly revenue) from the loaded rows, then
+    recreate the triggers.
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open write transaction
+
+    Returns:
+        int: Number of indexes and triggers recreated
+    """
+    objects = conn.execute('SELECT name, type, sql FROM import_deferred_objects').fetchall()
+
+    # New checkouts must not reuse an imported bill ID
+    conn.execute('''
+        UPDATE id_sequences SET value = MAX(value, (
+            SELECT COALESCE(MAX(CAST(substr(bill_id, 2) AS INTEGER)), 0) FROM orders
+            WHERE bill_id GLOB 'B[0-9]*'
+        ))
+        WHERE name = 'bill_id'
+    ''')
+
+    if not objects:
+        return 0
+
+    for _, object_type, sql in objects:
+        if object_type == 'index':
+            conn.execute(sql)
+
+    conn.execute('DELETE FROM delivery_slots')
+    conn.execute('''
+        INSERT INTO delivery_slots (slot_date, booked)
+        SELECT delivery_date_iso, COUNT(*) FROM orders
+        WHERE delivery_status NOT IN ('Delivered', 'Cancelled')
+        GROUP BY delivery_date_iso
+    ''')
+    monthrep.rebuild_rollup(conn)
+
+    for _, object_type, sql in objects:
+        if object_type == 'trigger':
+            conn.execute(sql)
+
+    conn.execute('DELETE FROM import_deferred_objects')
+    return len(objects)
+
+
+def _replace_items(conn, params):
+    """
+    Delete the existing items of the batch's bills, unless an earlier batch of this
+    import already did, so re-running an import never duplicates order_items.
+    Only bills whose order the importer inserted are touched.
+    """
+    bill_ids = [(bill_id,) for bill_id in sorted({item[0] for item in params})]
+    conn.executemany('''
+        DELETE FROM order_items
+        WHERE bill_id = ?
+          AND EXISTS (SELECT 1 FROM import_order_bills WHERE bill_id = order_items.bill_id)
+          AND NOT EXISTS (SELECT 1 FROM import_item_bills WHERE bill_id = order_items.bill_id)
+    ''', bill_ids)
+    conn.executemany('''
+        INSERT OR IGNORE INTO import_item_bills (bill_id)
+        SELECT bill_id FROM import_order_bills WHERE bill_id = ?
+    ''', bill_ids)
+
+
+def _write_batch(conn, source, path, file_size, insert_sql, params, rows_read, rows_rejected, completed):
+    """
+    Insert one batch and advance the source's progress row in the same transaction.
+    rows_* count CSV rows, records_* the orders or items they hold.
+    """
+    if source == 'orders':
+        conn.executemany(RECORD_ORDER_BILL_SQL, [(order[7], order[7]) for order in params])
+    else:
+        _replace_items(conn, params)
+        if completed:
+            conn.execute('DELETE FROM import_item_bills')
+
+    records_loaded = conn.executemany(insert_sql, params).rowcount if params else 0
+
+    conn.execute('''
+        INSERT INTO import_progress (source, path, file_size, rows_read, rows_rejected,
+                                     records_loaded, records_skipped, completed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET
+            rows_read = rows_read + excluded.rows_read,
+            rows_rejected = rows_rejected + excluded.rows_rejected,
+            records_loaded = records_loaded + excluded.records_loaded,
+            records_skipped = records_skipped + excluded.records_skipped,
+            completed = excluded.completed
+    ''', (source, path, file_size, rows_read, rows_rejected, records_loaded, len(params) - records_loaded, completed))
+    return records_loaded
+
+
+def import_csv(source, path, batch_size=IMPORT_BATCH_SIZE, restart=False):
+    """
+    Stream one legacy CSV file into its table in batches of batch_size rows,
+    one transaction per batch. Resumes after the last committed batch of an
+    earlier run of the same file.
+
+    Args:
+        source (str): 'orders' or 'order_items'
+        path (str): Path of the CSV file
+        batch_size (int): CSV rows per transaction
+        restart (bool): Forget earlier progress and read the file from the start
+
+    Returns:
+        dict: Dictionary with success status, message, rows_read, rows_rejected (invalid CSV rows),
+        records_loaded, records_skipped (orders or items already present or without an imported
+        order) and rows_per_second
+    """
+    insert_sql, formats = SOURCES[source]
+    file_size = os.path.getsize(path)
+
+    conn = db.get_connection()
+    try:
+        if restart:
+            conn.execute('DELETE FROM import_progress WHERE source = ?', (source,))
+            if source == 'order_items':
+                conn.execute('DELETE FROM import_item_bills')
+            conn.commit()
+        progress = conn.execute('SELECT * FROM import_progress WHERE source = ?', (source,)).fetchone()
+    finally:
+        db.release_connection(conn)
+
+    if progress and (progress['path'] != path or progress['file_size'] != file_size):
+        return {'success': False, 'message': f'{path} is not the file of the earlier {source} import; use --restart'}
+    if progress and progress['completed']:
+        return {'success': True, 'message': f'{source}: already imported from {path}',
+                'rows_read': 0, 'rows_rejected': 0, 'records_loaded': 0, 'records_skipped': 0,
+                'rows_per_second': 0}
+
+    skip = progress['rows_read'] if progress else 0
+    totals = {'rows_read': 0, 'rows_rejected': 0, 'records_loaded': 0, 'records_skipped': 0}
+    errors_reported = 0
+    started = time.perf_counter()
+
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        reader = csv.DictReader(file)
+        headers = [_normalize_header(name) for name in reader.fieldnames or []]
+        matching = [(parse_row, expands) for required, parse_row, expands in formats
+                    if all(column in headers for column in required)]
+        if not matching:
+            expected = ' or '.join(f"({', '.join(required)})" for required, _, _ in formats)
+            return {'success': False, 'message': f"{path}: unrecognised {source} file, expected columns {expected}"}
+        parse_row, expands = matching[0]
+        reader.fieldnames = headers
+
+        if skip:
+            print(f"  {source}: resuming after {skip} rows")
+        rows = islice(reader, skip, None)
+        line_number = skip + 1
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            params = []
+            rejected = 0
+
+            for row in batch:
+                line_number += 1
+                try:
+                    if expands:
+                        params.extend(parse_row(row))
+                    else:
+                        params.append(parse_row(row))
+                except ValueError as e:
+                    rejected += 1
+                    if errors_reported < MAX_REPORTED_ERRORS:
+                        print(f"  {source}: line {line_number} rejected: {e}")
+                        errors_reported += 1
+
+            completed = len(batch) < batch_size
+            try:
+                loaded = db.run_in_transaction(_write_batch, source, path, file_size, insert_sql,
+                                               params, len(batch), rejected, int(completed))
+            except sqlite3.Error as e:
+                print(f"Database error: {e}")
+                return {'success': False, 'message': f'{source}: import stopped at line {line_number - len(batch)}',
+                        **totals}
+
+            totals['rows_read'] += len(batch)
+            totals['rows_rejected'] += rejected
+            totals['records_loaded'] += loaded
+            totals['records_skipped'] += len(params) - loaded
+            elapsed = time.perf_counter() - started
+            rate = round(totals['rows_read'] / elapsed) if elapsed else 0
+            print(f"  {source}: {skip + totals['rows_read']} rows read, {totals['rows_rejected']} rejected; "
+                  f"{totals['records_loaded']} loaded, {totals['records_skipped']} skipped ({rate} rows/s)")
+
+            if completed:
+                break
+
+    elapsed = time.perf_counter() - started
+    totals['rows_per_second'] = round(totals['rows_read'] / elapsed) if elapsed else totals['rows_read']
+    return {'success': True, 'message': f"{source}: imported {totals['records_loaded']} records from {path}", **totals}
+
+
+def _is_completed(source, path):
+    """Check whether an earlier run already imported this exact file."""
+    conn = db.get_connection()
+    try:
+        progress = conn.execute('SELECT * FROM import_progress WHERE source = ?', (source,)).fetchone()
+    finally:
+        db.release_connection(conn)
+    return bool(progress and progress['completed'] and progress['path'] == path
+                and progress['file_size'] == os.path.getsize(path))
+
+
+def run_import(orders_path=ORDERS_CSV, items_path=ORDER_DETAILS_CSV, batch_size=IMPORT_BATCH_SIZE,
+               restart=False, defer=True):
+    """
+    Import the legacy orders file and then its order details file. Missing files
+    are skipped.
+
+    Args:
+        orders_path (str): Path of customer_orders.csv
+        items_path (str): Path of cust_order_details.csv
+        batch_size (int): CSV rows per transaction
+        restart (bool): Ignore progress of earlier runs
+        defer (bool): Drop secondary indexes and triggers during the load
+
+    Returns:
+        dict: Dictionary with success status, message and per-source results
+    """
+    paths = {'orders': orders_path, 'order_items': items_path}
+    results = {}
+    found = any(path and os.path.exists(path) for path in paths.values())
+    pending = found and any(path and os.path.exists(path) and (restart or not _is_completed(source, path))
+                            for source, path in paths.items())
+
+    started = time.perf_counter()
+    try:
+        if pending and defer:
+            dropped = db.run_in_transaction(defer_indexes)
+            if dropped:
+                print(f"Deferred {dropped} indexes and triggers until the load is done")
+
+        for source, path in paths.items():
+            if not found:
+                break
+            if not path or not os.path.exists(path):
+                print(f"  {source}: {path} not found, skipped")
+                continue
+            results[source] = import_csv(source, path, batch_size, restart)
+            print(results[source]['message'])
+            if not results[source]['success']:
+                break
+
+    finally:
+        # Also after a failure, so the app never runs without its indexes and triggers;
+        # a later run defers them again and resumes from the recorded progress
+        index_started = time.perf_counter()
+        restored = db.run_in_transaction(restore_deferred)
+        if restored:
+            print(f"Rebuilt {restored} indexes and triggers in {time.perf_counter() - index_started:.1f} s")
+
+    if not found:
+        return {'success': False, 'message': 'No legacy CSV files found', 'results': results}
+
+    elapsed = time.perf_counter() - started
+    rows = sum(result.get('rows_read', 0) for result in results.values())
+    success = all(result['success'] for result in results.values())
+    return {
+        'success': success,
+        'message': f'{rows} rows in {elapsed:.1f} s ({round(rows / elapsed) if elapsed else rows} rows/s overall)',
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import legacy CSV order history into the database')
+    parser.add_argument('--orders', default=ORDERS_CSV, help='legacy orders file')
+    parser.add_argument('--items', default=ORDER_DETAILS_CSV, help='legacy order details file')
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='rows per transaction')
+    parser.add_argument('--restart', action='store_true', help='read the files from the start, ignoring progress of an earlier run')
+    args = parser.parse_args()
+
+    import schema
+    schema.migrate()
+    result = run_import(args.orders, args.items, args.batch_size, args.restart)
+    print(result['message'])
+    if not result['success']:
+        sys.exit(1)
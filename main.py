@@ -6,11 +6,27 @@ import OwnerSOD
 import CustSOD
 import Manipulation_of_cart_edited as cart_module
 import addresses
+import bill
+import compression
+import images
+import db
+import schema
+import export
+import events
+import versions
 
-from flask import Flask, request, render_template, redirect, url_for, flash, session, jsonify
+import json
+import tempfile
+
+from flask import Flask, Response, request, redirect, url_for, flash, session, jsonify, send_file
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'  # Required for session management
+db.init_app(app)  # Share one pooled database connection per request
+schema.migrate()  # Create/upgrade tables once at startup, not on every request
+app.jinja_env.get_template('bill.html')  # Compile the bill template once at startup
+compression.init_app(app)  # gzip/brotli for JSON, HTML, NDJSON and CSV bodies
+images.init_app(app)  # Fingerprinted static images (and WebP/AVIF variants) for the templates
 
 users = {
     "customer": {"username": "customer123", "password": "custpass"},
@@ -19,14 +35,78 @@ users = {
 
 signups = []
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Page templates rendered without context, so they are compressed once at startup
+PAGE_TEMPLATES = [
+    'Home Page.html', 'General Login.html', 'cust_home_page.html', 'Laundry Cart.html',
+    'DeliveryStatusCust.html', 'own_home.html', 'report.html', 'own_sod.html'
+]
+
+
+def wants_ndjson():
+    """Check whether the client asked for a streamed NDJSON body (?format=ndjson or Accept header)."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(records, headers=None):
+    """
+    Stream records as newline-delimited JSON, one object per line, as they are
+    produced, instead of building the whole list and body in memory.
+
+    Args:
+        records (iterable): Generator of JSON-serialisable dicts
+        headers (dict): Extra response headers
+
+    Returns:
+        Response: Streamed Flask response
+    """
+    lines = (json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+    return Response(lines, mimetype=NDJSON_MIMETYPE, headers=headers)
+
+
+def not_modified(etag):
+    """
+    Answer a conditional GET whose If-None-Match already holds the current ETag.
+
+    Args:
+        etag (str): Current ETag of the resource (see versions.make_etag)
+
+    Returns:
+        Response: Empty 304 response, or None if the client's copy is missing or stale
+    """
+    # Weak comparison, since compressed responses carry the weak form of the ETag
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response, etag):
+    """
+    Tag a response so the browser revalidates it with If-None-Match on every use.
+
+    Args:
+        response (Response): Response to tag
+        etag (str): ETag computed before the response's queries ran
+
+    Returns:
+        Response: The same response
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept')
+    return response
+
 
 @app.route('/')
 def home():
-    return render_template('Home Page.html')
+    return compression.template_response('Home Page.html')
 
 @app.route('/log_select')
 def login_page():
-    return render_template('General Login.html')
+    return compression.template_response('General Login.html')
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -99,7 +179,7 @@ def signup():
 def customer_home():
     if not session.get('logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('cust_home_page.html')
+    return compression.template_response('cust_home_page.html')
 
 
 @app.route('/laundry_cart')
@@ -107,7 +187,7 @@ def laundry_cart():
     # Check if customer is logged in
     if not session.get('logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('Laundry Cart.html')
+    return compression.template_response('Laundry Cart.html')
 
 
 @app.route('/customer_delivery_status')
@@ -115,7 +195,7 @@ def customer_delivery_status():
     # Check if customer is logged in
     if not session.get('logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('DeliveryStatusCust.html')
+    return compression.template_response('DeliveryStatusCust.html')
 
 
 @app.route('/api/customer/orders', methods=['GET'])
@@ -133,10 +213,16 @@ def get_customer_orders():
         month = request.args.get('month', type=int)
         year = request.args.get('year', type=int)
 
+        # Each filtered view gets its own ETag, so one view's copy never validates another's
+        etag = versions.make_etag(('orders', customer_id), variant=(month, year))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
         # Get customer orders
         orders = CustSOD.get_customer_orders(customer_id, month, year)
 
-        return jsonify({'orders': orders})
+        return with_etag(jsonify({'orders': orders}), etag)
     except Exception as e:
         print(f"Error in get_customer_orders: {e}")
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -171,10 +257,34 @@ def get_customer_stats():
     if not customer_id:
         return jsonify({'error': 'Customer ID not found'}), 401
 
+    etag = versions.make_etag(('orders', customer_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     # Get customer statistics
     stats = CustSOD.get_customer_statistics(customer_id)
 
-    return jsonify(stats)
+    return with_etag(jsonify(stats), etag)
+
+
+@app.route('/api/customer/events', methods=['GET'])
+def customer_events():
+    """Server-Sent Events stream of status changes to the logged-in customer's orders"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    customer_id = session.get('customer_id')
+    if not customer_id:
+        return jsonify({'error': 'Customer ID not found'}), 401
+
+    # Sent by the browser's EventSource when it reconnects, to replay what it missed
+    subscription = events.bus.subscribe(customer_id, request.headers.get('Last-Event-ID'))
+
+    return Response(events.bus.stream(subscription), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop reverse proxies from buffering the stream
+    })
 
 
 @app.route('/own_home_page')
@@ -182,7 +292,7 @@ def owner_home():
     # Check if owner is logged in
     if not session.get('owner_logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('own_home.html')
+    return compression.template_response('own_home.html')
 
 @app.route('/generate_orders', methods=['POST'])
 def generate_orders():
@@ -200,7 +310,7 @@ def report_page():
     # Check if owner is logged in
     if not session.get('owner_logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('report.html')
+    return compression.template_response('report.html')
 
 
 @app.route('/monthly_report', methods=['GET'])
@@ -209,14 +319,29 @@ def monthly_report():
     if not session.get('owner_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get month and year from query parameters
+    # Get the period and page from query parameters
     month = request.args.get('month', type=int)
     year = request.args.get('year', type=int)
+    page = request.args.get('page', 1, type=int)
+    page_size = min(request.args.get('page_size', monthrep.REPORT_PAGE_SIZE, type=int), 500)
+
+    etag = versions.make_etag('orders', variant=('ndjson' if wants_ndjson() else 'json', month, year, page, page_size))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # Whole period as one order per line; totals come from the rollup in headers
+    if wants_ndjson():
+        summary = monthrep.get_revenue_summary(month, year)
+        return with_etag(ndjson_response(monthrep.iter_monthly_orders(month, year), headers={
+            'X-Total-Orders': str(summary['total_orders']),
+            'X-Total-Revenue': str(summary['total_revenue'])
+        }), etag)
+
+    # Get monthly report data: totals from the rollup, one page of order rows
+    report_data = monthrep.get_monthly_report(month, year, page, max(page_size, 1))
     
-    # Get monthly report data
-    report_data = monthrep.get_monthly_report(month, year)
-    
-    return jsonify(report_data)
+    return with_etag(jsonify(report_data), etag)
 
 
 @app.route('/own_sod.html')
@@ -224,7 +349,7 @@ def owner_sod_page():
     # Check if owner is logged in
     if not session.get('owner_logged_in'):
         return redirect(url_for('login_page'))
-    return render_template('own_sod.html')
+    return compression.template_response('own_sod.html')
 
 
 @app.route('/api/orders', methods=['GET'])
@@ -233,13 +358,31 @@ def get_orders():
     if not session.get('owner_logged_in'):
         return jsonify({'error': 'Unauthorized'}), 401
     
-    # Get status filter from query parameters
-    status_filter = request.args.get('status')  # 'Delivered', 'Undelivered', or None
+    # Get status filter and page position from query parameters
+    status_filter = request.args.get('status')  # e.g. 'Delivered', or None for all
+    page_size = request.args.get('limit', OwnerSOD.ORDERS_PAGE_SIZE, type=int)
+    page_size = min(max(page_size, 1), OwnerSOD.MAX_ORDERS_PAGE_SIZE)
+    cursor_token = request.args.get('cursor')
+    if cursor_token and OwnerSOD.decode_cursor(cursor_token) is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    etag = versions.make_etag('orders', variant=('ndjson' if wants_ndjson() else 'json',
+                                                 status_filter, page_size, cursor_token))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    # Full order history (after the cursor, if any) as one order per line
+    if wants_ndjson():
+        return with_etag(ndjson_response(OwnerSOD.iter_all_orders(status_filter, cursor_token)), etag)
+    
+    # Get one page of orders from database
+    result = OwnerSOD.get_orders_page(status_filter, page_size, cursor_token)
     
-    # Get orders from database
-    orders = OwnerSOD.get_all_orders(status_filter)
+    if not result['success']:
+        return jsonify({'error': result['message']}), 500
     
-    return jsonify({'orders': orders})
+    return with_etag(jsonify({'orders': result['orders'], 'next_cursor': result['next_cursor']}), etag)
 
 
 @app.route('/api/order/<bill_id>', methods=['GET'])
@@ -301,6 +444,26 @@ def add_to_cart():
     return jsonify(result)
 
 
+@app.route('/api/cart/batch', methods=['POST'])
+def cart_batch():
+    # Check if customer is logged in
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    customer_id = session.get('customer_id')
+    if not customer_id:
+        return jsonify({'success': False, 'message': 'Customer ID not found'}), 401
+
+    # {"operations": [{"op": "add" | "set" | "remove", "item_name": "Shirt", "quantity": 2}, ...]}
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        return jsonify({'success': False, 'message': 'operations must be a list of objects'}), 400
+
+    result = cart_module.apply_cart_operations(customer_id, operations)
+    return jsonify(result)
+
+
 @app.route('/api/cart/items', methods=['GET'])
 def get_cart_items():
     # Check if customer is logged in
@@ -311,8 +474,13 @@ def get_cart_items():
     if not customer_id:
         return jsonify({'items': []}), 401
 
+    etag = versions.make_etag(('cart', customer_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     items = cart_module.get_cart_items(customer_id)
-    return jsonify({'items': items})
+    return with_etag(jsonify({'items': items}), etag)
 
 
 @app.route('/api/cart/remove/<item_name>', methods=['DELETE'])
@@ -374,15 +542,12 @@ def generate_bill(bill_id):
         if not customer_id:
             return jsonify({'error': 'Customer ID not found'}), 401
 
-        # Get order details with items
-        order_details = CustSOD.get_order_details_for_customer(bill_id, customer_id)
+        # Rendered once per order status, then served from the bill cache
+        bill_html = bill.get_bill_html(bill_id, customer_id)
 
-        if not order_details:
+        if bill_html is None:
             return jsonify({'error': 'Order not found'}), 404
 
-        # Generate HTML bill content
-        bill_html = generate_bill_html(order_details)
-
         return jsonify({
             'bill_html': bill_html,
             'bill_id': bill_id
@@ -392,333 +557,6 @@ def generate_bill(bill_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 
-def generate_bill_html(order_details):
-    """Generate HTML content for the bill"""
-    items_html = ""
-    subtotal = 0
-
-    for item in order_details['items']:
-        # Convert sqlite3.Row to dict if needed
-        if hasattr(item, 'keys'):
-            item_dict = dict(item)
-        else:
-            item_dict = item
-
-        item_total = float(item_dict['total_price'])
-        subtotal += item_total
-
-        items_html += f"""
-        <tr>
-            <td>{item_dict['item_name']}</td>
-            <td style="text-align: center;">{item_dict['quantity']}</td>
-            <td style="text-align: right;">₹{float(item_dict['unit_price']):.2f}</td>
-            <td style="text-align: right;">₹{item_total:.2f}</td>
-        </tr>
-        """
-
-    # Calculate totals
-    total_amount = float(order_details['bill_amount'])
-
-    bill_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Laundry Bill - {order_details['bill_id']}</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background: #f5f5f5;
-                color: #333;
-            }}
-            .bill-container {{
-                max-width: 700px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 10px;
-                box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                overflow: hidden;
-            }}
-            .bill-header {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 30px;
-                text-align: center;
-            }}
-            .bill-header h1 {{
-                margin: 0 0 10px 0;
-                font-size: 32px;
-                font-weight: bold;
-            }}
-            .bill-header .subtitle {{
-                margin: 0;
-                font-size: 16px;
-                opacity: 0.9;
-            }}
-            .bill-header .bill-id {{
-                margin-top: 15px;
-                font-size: 18px;
-                font-weight: bold;
-                background: rgba(255,255,255,0.2);
-                padding: 8px 16px;
-                border-radius: 20px;
-                display: inline-block;
-            }}
-            .bill-body {{
-                padding: 30px;
-            }}
-            .bill-info {{
-                display: grid;
-                grid-template-columns: 1fr 1fr;
-                gap: 20px;
-                margin-bottom: 30px;
-            }}
-            .info-section {{
-                background: #f8f9fa;
-                padding: 20px;
-                border-radius: 8px;
-            }}
-            .info-section h3 {{
-                margin: 0 0 15px 0;
-                color: #667eea;
-                font-size: 16px;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }}
-            .info-row {{
-                display: flex;
-                justify-content: space-between;
-                margin-bottom: 8px;
-                padding-bottom: 8px;
-                border-bottom: 1px solid #dee2e6;
-            }}
-            .info-row:last-child {{
-                border-bottom: none;
-                margin-bottom: 0;
-                padding-bottom: 0;
-            }}
-            .info-row strong {{
-                color: #495057;
-            }}
-            .status-badge {{
-                display: inline-block;
-                padding: 4px 12px;
-                border-radius: 12px;
-                font-size: 12px;
-                font-weight: bold;
-                text-transform: uppercase;
-            }}
-            .status-delivered {{ background: #d4edda; color: #155724; }}
-            .status-order-placed {{ background: #cce5ff; color: #004085; }}
-            .status-in-process {{ background: #e2e3e5; color: #383d41; }}
-            .status-out-for-delivery {{ background: #fff3cd; color: #856404; }}
-            .status-order-picked {{ background: #d1ecf1; color: #0c5460; }}
-            .items-section {{
-                margin-bottom: 30px;
-            }}
-            .items-section h3 {{
-                margin: 0 0 20px 0;
-                color: #667eea;
-                font-size: 18px;
-                text-align: center;
-            }}
-            .items-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 20px 0;
-                border: 1px solid #dee2e6;
-                border-radius: 8px;
-                overflow: hidden;
-            }}
-            .items-table th {{
-                background: #667eea;
-                color: white;
-                padding: 15px 12px;
-                text-align: left;
-                font-weight: bold;
-                border-bottom: 2px solid #dee2e6;
-            }}
-            .items-table td {{
-                padding: 15px 12px;
-                border-bottom: 1px solid #dee2e6;
-                background: #fff;
-            }}
-            .items-table tr:nth-child(even) td {{
-                background: #f8f9fa;
-            }}
-            .items-table tr:hover td {{
-                background: #e9ecef;
-            }}
-            .total-section {{
-                background: #f8f9fa;
-                border: 2px solid #667eea;
-                border-radius: 8px;
-                padding: 20px;
-                margin-top: 20px;
-            }}
-            .total-row {{
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                font-size: 18px;
-                font-weight: bold;
-                color: #495057;
-                margin-bottom: 10px;
-            }}
-            .grand-total {{
-                font-size: 24px;
-                color: #667eea;
-                border-top: 2px solid #667eea;
-                padding-top: 15px;
-                margin-top: 15px;
-            }}
-            .bill-footer {{
-                background: #667eea;
-                color: white;
-                padding: 25px 30px;
-                text-align: center;
-                margin-top: 30px;
-            }}
-            .bill-footer h4 {{
-                margin: 0 0 10px 0;
-                font-size: 18px;
-            }}
-            .contact-info {{
-                display: flex;
-                justify-content: center;
-                gap: 30px;
-                flex-wrap: wrap;
-            }}
-            .contact-item {{
-                display: flex;
-                align-items: center;
-                gap: 8px;
-            }}
-            @media print {{
-                body {{
-                    background: white !important;
-                    padding: 0 !important;
-                }}
-                .bill-container {{
-                    box-shadow: none !important;
-                    margin: 0 !important;
-                }}
-                .no-print {{
-                    display: none !important;
-                }}
-            }}
-            @media (max-width: 600px) {{
-                .bill-info {{
-                    grid-template-columns: 1fr;
-                }}
-                .contact-info {{
-                    flex-direction: column;
-                    gap: 10px;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="bill-container">
-            <div class="bill-header">
-                <h1>🧺 DoubleBubble Laundry</h1>
-                <p class="subtitle">Professional Laundry & Dry Cleaning Services</p>
-                <div class="bill-id">Bill #{order_details['bill_id']}</div>
-            </div>
-
-            <div class="bill-body">
-                <div class="bill-info">
-                    <div class="info-section">
-                        <h3>Customer Details</h3>
-                        <div class="info-row">
-                            <strong>Name:</strong>
-                            <span>{order_details['customer_name']}</span>
-                        </div>
-                        <div class="info-row">
-                            <strong>Customer ID:</strong>
-                            <span>{order_details['customer_id']}</span>
-                        </div>
-                    </div>
-
-                    <div class="info-section">
-                        <h3>Order Details</h3>
-                        <div class="info-row">
-                            <strong>Pickup Date:</strong>
-                            <span>{order_details.get('order_pickup_date', 'N/A')}</span>
-                        </div>
-                        <div class="info-row">
-                            <strong>Delivery Date:</strong>
-                            <span>{order_details.get('order_delivery_date', 'N/A')}</span>
-                        </div>
-                        <div class="info-row">
-                            <strong>Status:</strong>
-                            <span class="status-badge status-{order_details['delivery_status'].lower().replace(' ', '-')}">{order_details['delivery_status']}</span>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="items-section">
-                    <h3>Laundry Items</h3>
-                    <table class="items-table">
-                        <thead>
-                            <tr>
-                                <th>Item Description</th>
-                                <th style="text-align: center;">Quantity</th>
-                                <th style="text-align: right;">Rate (₹)</th>
-                                <th style="text-align: right;">Amount (₹)</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {items_html}
-                        </tbody>
-                    </table>
-
-                    <div class="total-section">
-                        <div class="total-row">
-                            <span>Subtotal:</span>
-                            <span>₹{subtotal:.2f}</span>
-                        </div>
-                        <div class="total-row">
-                            <span>GST (18%):</span>
-                            <span>₹{(subtotal * 0.18):.2f}</span>
-                        </div>
-                        <div class="total-row grand-total">
-                            <span>Total Amount:</span>
-                            <span>₹{total_amount:.2f}</span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <div class="bill-footer">
-                <h4>Thank you for choosing DoubleBubble Laundry Services!</h4>
-                <div class="contact-info">
-                    <div class="contact-item">
-                        <span>📞</span>
-                        <span>+91-9876543210</span>
-                    </div>
-                    <div class="contact-item">
-                        <span>📧</span>
-                        <span>info@doublebubble.com</span>
-                    </div>
-                    <div class="contact-item">
-                        <span>🌐</span>
-                        <span>www.doublebubble.com</span>
-                    </div>
-                </div>
-                <p style="margin-top: 15px; font-size: 12px; opacity: 0.8;">
-                    This is a computer-generated bill. No signature required.
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    return bill_html
-
-
 @app.route('/api/cancel-order/<bill_id>', methods=['POST'])
 def cancel_order(bill_id):
     # Check if customer is logged in
@@ -761,8 +599,13 @@ def get_customer_addresses():
     if not customer_id:
         return jsonify({'success': False, 'message': 'Customer ID not found'}), 401
 
+    etag = versions.make_etag(('addresses', customer_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     addresses_list = addresses.get_customer_addresses(customer_id)
-    return jsonify({'success': True, 'addresses': addresses_list})
+    return with_etag(jsonify({'success': True, 'addresses': addresses_list}), etag)
 
 
 @app.route('/api/addresses', methods=['POST'])
@@ -849,6 +692,47 @@ def get_default_address():
         return jsonify({'success': True, 'address': None})
 
 
+@app.route('/api/export/orders', methods=['GET'])
+def export_orders():
+    """
+    Download orders joined with their items for a delivery date range (owner only).
+    Query parameters: from, to (DD-MM-YYYY, inclusive) and format ('csv' or 'parquet').
+    """
+    if not session.get('owner_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in export.EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {fmt}'}), 400
+    if fmt == 'parquet' and not export.parquet_available():
+        return jsonify({'error': 'Parquet export is not available on this server'}), 400
+
+    try:
+        start, end = export.parse_date_range(request.args.get('from'), request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'Invalid date. Use DD-MM-YYYY'}), 400
+
+    if fmt == 'parquet':
+        # Parquet needs a seekable file; spool it to a temporary file deleted once sent
+        spool = tempfile.TemporaryFile()
+        export.write_parquet(spool, start, end)
+        spool.seek(0)
+        return send_file(spool, mimetype='application/vnd.apache.parquet',
+                         as_attachment=True, download_name='orders.parquet')
+
+    return Response(export.iter_csv_chunks(start, end), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=orders.csv'})
+
+
+@app.route('/api/db/pool-stats', methods=['GET'])
+def get_db_pool_stats():
+    """Get connection pool hit/miss statistics (owner only)"""
+    if not session.get('owner_logged_in'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify(db.pool_stats())
+
+
 @app.route('/signout')
 def signout():
     # Clear all session data
@@ -857,5 +741,8 @@ def signout():
     return redirect(url_for('home'))
 
 
+compression.precompress_templates(app, PAGE_TEMPLATES)
+
+
 if __name__ == '__main__':
     app.run(debug=True)
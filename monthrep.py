@@ -2,45 +2,90 @@
 # Flask-compatible module for generating monthly reports from database
 
 import sqlite3
+import sys
 from datetime import datetime
 
-# Database file name
-DB_FILE = 'customer_db.sqlite'
+import db
 
+# Orders per page of report rows
+REPORT_PAGE_SIZE = 50
 
-def init_orders_database():
+# Order status -> monthly_revenue column counting orders in that status
+STATUS_COLUMNS = {
+    'Order Placed': 'placed_orders',
+    'Order Picked': 'picked_orders',
+    'In Process': 'in_process_orders',
+    'Out for Delivery': 'out_for_delivery_orders',
+    'Delivered': 'delivered_orders',
+    'Cancelled': 'cancelled_orders',
+}
+
+
+def get_period_bounds(month=None, year=None):
     """
-    Initialize the SQLite database and create orders table if it doesn't exist.
-    Also migrates data from CSV file if database is empty.
+    Get the delivery date range covered by a month/year filter.
+
+    Args:
+        month (int): Month number (1-12). If None, the whole year is covered.
+        year (int): Year number. If None, uses current year when a month is given.
+
+    Returns:
+        tuple: (start, end) ISO dates (YYYY-MM-DD), start inclusive and end exclusive,
+               or None when neither month nor year is given (no filtering)
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    # Create orders table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id TEXT NOT NULL,
-            customer_name TEXT NOT NULL,
-            pickup_address TEXT NOT NULL,
-            delivery_address TEXT NOT NULL,
-            order_pickup_date TEXT NOT NULL,
-            order_delivery_date TEXT NOT NULL,
-            bill_amount REAL NOT NULL CHECK(bill_amount >= 0),
-            bill_id TEXT UNIQUE NOT NULL,
-            delivery_status TEXT NOT NULL DEFAULT 'Order Placed'
-                CHECK(delivery_status IN ('Order Placed', 'Order Picked', 'In Process', 'Out for Delivery', 'Delivered', 'Cancelled')),
-            cancelled_by TEXT CHECK(cancelled_by IN ('customer', NULL)),
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    if month is None and year is None:
+        return None
+
+    if year is None:
+        year = datetime.now().year
+
+    if month is None:
+        return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+    if month == 12:
+        return f"{year:04d}-12-01", f"{year + 1:04d}-01-01"
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month + 1:02d}-01"
+
+
+def _order_from_row(row):
+    return {
+        'customer_id': row['customer_id'],
+        'customer_name': row['customer_name'],
+        'order_pickup_date': row['order_pickup_date'],
+        'order_delivery_date': row['order_delivery_date'],
+        'bill_amount': row['bill_amount'],
+        'bill_id': row['bill_id'],
+        'delivery_status': row['delivery_status']
+    }
+
+
+def _query_monthly_orders(cursor, month=None, year=None, limit=None, offset=0):
+    """Run the report order query on cursor; see get_monthly_orders() for the arguments."""
+    # Range scan on the indexed ISO delivery date instead of parsing DD-MM-YYYY text per row
+    conditions = ''
+    params = []
+
+    period = get_period_bounds(month, year)
+    if period:
+        conditions = 'WHERE delivery_date_iso >= ? AND delivery_date_iso < ?'
+        params.extend(period)
 
+    paging = ''
+    if limit is not None:
+        paging = 'LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
 
-def get_monthly_orders(month=None, year=None):
+    return cursor.execute(f'''
+        SELECT customer_id, customer_name, order_pickup_date, order_delivery_date,
+               bill_amount, bill_id, delivery_status
+        FROM orders
+        {conditions}
+        ORDER BY delivery_date_iso DESC, bill_id DESC
+        {paging}
+    ''', params)
+
+
+def get_monthly_orders(month=None, year=None, limit=None, offset=0):
     """
     Get orders from database filtered by month and year.
     Orders are returned in descending order of delivery date.
@@ -48,127 +93,168 @@ def get_monthly_orders(month=None, year=None):
     Args:
         month (int): Month number (1-12). If None, returns all orders.
         year (int): Year number. If None, uses current year.
+        limit (int): Maximum number of orders to return. If None, returns all of them.
+        offset (int): Number of orders to skip (for paging)
     
     Returns:
         list: List of dictionaries containing order information
     """
-    init_orders_database()
-    
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+    conn = db.get_connection()
     cursor = conn.cursor()
     
     try:
-        if month is None and year is None:
-            # Get all orders, sorted by delivery date descending
-            # Date format is DD-MM-YYYY, convert to YYYY-MM-DD for proper sorting
-            cursor.execute('''
-                SELECT customer_id, customer_name, order_pickup_date, order_delivery_date,
-                       bill_amount, bill_id, delivery_status
-                FROM orders
-                ORDER BY
-                    CASE
-                        WHEN length(order_delivery_date) = 10 AND substr(order_delivery_date, 3, 1) = '-' THEN
-                            substr(order_delivery_date, 7, 4) || '-' ||
-                            substr(order_delivery_date, 4, 2) || '-' ||
-                            substr(order_delivery_date, 1, 2)
-                        ELSE order_delivery_date
-                    END DESC
-            ''')
-        elif month is None and year is not None:
-            # Filter by year only
-            year_str = str(year)
-
-            cursor.execute('''
-                SELECT customer_id, customer_name, order_pickup_date, order_delivery_date,
-                       bill_amount, bill_id, delivery_status
-                FROM orders
-                WHERE length(order_delivery_date) = 10
-                  AND substr(order_delivery_date, 7, 4) = ?
-                ORDER BY
-                    substr(order_delivery_date, 7, 4) || '-' ||
-                    substr(order_delivery_date, 4, 2) || '-' ||
-                    substr(order_delivery_date, 1, 2) DESC
-            ''', (year_str,))
-        else:
-            # Filter by month and year
-            if year is None:
-                year = datetime.now().year
-
-            # Parse dates and filter by month/year
-            # Date format is DD-MM-YYYY, extract month (positions 4-5) and year (positions 7-10)
-            month_str = f"{month:02d}"  # Format month as 2-digit string
-            year_str = str(year)
-
-            cursor.execute('''
-                SELECT customer_id, customer_name, order_pickup_date, order_delivery_date,
-                       bill_amount, bill_id, delivery_status
-                FROM orders
-                WHERE length(order_delivery_date) = 10
-                  AND substr(order_delivery_date, 4, 2) = ?
-                  AND substr(order_delivery_date, 7, 4) = ?
-                ORDER BY
-                    substr(order_delivery_date, 7, 4) || '-' ||
-                    substr(order_delivery_date, 4, 2) || '-' ||
-                    substr(order_delivery_date, 1, 2) DESC
-            ''', (month_str, year_str))
-        
-        orders = []
-        for row in cursor.fetchall():
-            orders.append({
-                'customer_id': row['customer_id'],
-                'customer_name': row['customer_name'],
-                'order_pickup_date': row['order_pickup_date'],
-                'order_delivery_date': row['order_delivery_date'],
-                'bill_amount': row['bill_amount'],
-                'bill_id': row['bill_id'],
-                'delivery_status': row['delivery_status']
-            })
+        rows = _query_monthly_orders(cursor, month, year, limit, offset).fetchall()
+        orders = [_order_from_row(row) for row in rows]
         
-        conn.close()
+        db.release_connection(conn)
         return orders
     
     except sqlite3.Error as e:
-        conn.close()
+        db.release_connection(conn)
         print(f"Database error: {e}")
         return []
 
 
-def calculate_total_revenue(orders):
+def iter_monthly_orders(month=None, year=None):
     """
-    Calculate total revenue from a list of orders.
-    
+    Stream every order of the period one at a time, in the same order as
+    get_monthly_orders(), so yearly and all-time exports use constant memory.
+
     Args:
-        orders (list): List of order dictionaries
-    
+        month (int): Month number (1-12). If None, covers the whole year.
+        year (int): Year number. If None, uses current year when a month is given.
+
+    Yields:
+        dict: Order information
+    """
+    for row in db.iter_rows(_query_monthly_orders, month, year):
+        yield _order_from_row(row)
+
+
+def get_revenue_summary(month=None, year=None):
+    """
+    Get order count, revenue and per-status counts for a period from the
+    monthly_revenue rollup, without reading any order rows.
+
+    Args:
+        month (int): Month number (1-12). If None, covers the whole year.
+        year (int): Year number. If None, uses current year when a month is given.
+
     Returns:
-        float: Total revenue
+        dict: total_orders, total_revenue and status_counts (status -> count)
     """
-    return sum(order['bill_amount'] for order in orders)
+    conn = db.get_connection()
+
+    try:
+        conditions = ''
+        params = []
+
+        if month is not None:
+            conditions = 'WHERE year = ? AND month = ?'
+            params = [year if year else datetime.now().year, month]
+        elif year is not None:
+            conditions = 'WHERE year = ?'
+            params = [year]
+
+        status_sums = ', '.join(f'COALESCE(SUM({column}), 0)' for column in STATUS_COLUMNS.values())
+        row = conn.execute(f'''
+            SELECT COALESCE(SUM(order_count), 0), COALESCE(SUM(revenue), 0), {status_sums}
+            FROM monthly_revenue
+            {conditions}
+        ''', params).fetchone()
+
+        db.release_connection(conn)
+        return {
+            'total_orders': row[0],
+            'total_revenue': round(row[1], 2),
+            'status_counts': dict(zip(STATUS_COLUMNS, row[2:]))
+        }
 
+    except sqlite3.Error as e:
+        db.release_connection(conn)
+        print(f"Database error: {e}")
+        return {'total_orders': 0, 'total_revenue': 0, 'status_counts': {}}
 
-def get_monthly_report(month=None, year=None):
+
+def get_monthly_report(month=None, year=None, page=1, page_size=REPORT_PAGE_SIZE):
     """
-    Get monthly report with orders and total revenue.
+    Get monthly report with one page of orders and the period totals.
+    Totals come from the monthly_revenue rollup, so they cost the same for
+    any period; only the requested page of order rows is read.
     
     Args:
         month (int): Month number (1-12). If None, returns all orders.
         year (int): Year number. If None, uses current year.
+        page (int): 1-based page number of order rows
+        page_size (int): Orders per page
     
     Returns:
-        dict: Dictionary containing orders, total_revenue, total_orders, month, year
+        dict: Dictionary containing orders, total_revenue, total_orders, status_counts,
+              page, page_size, total_pages, month, year
     """
-    orders = get_monthly_orders(month, year)
-    total_revenue = calculate_total_revenue(orders)
+    page = max(page, 1)
+    summary = get_revenue_summary(month, year)
+    orders = get_monthly_orders(month, year, limit=page_size, offset=(page - 1) * page_size)
     
     return {
         'orders': orders,
-        'total_revenue': total_revenue,
-        'total_orders': len(orders),
+        'total_revenue': summary['total_revenue'],
+        'total_orders': summary['total_orders'],
+        'status_counts': summary['status_counts'],
+        'page': page,
+        'page_size': page_size,
+        'total_pages': -(-summary['total_orders'] // page_size),
         'month': month,
         'year': year if year else datetime.now().year
     }
 
 
-# Initialize database when module is imported
-init_orders_database()
+def rebuild_rollup(conn):
+    """
+    Recompute every monthly_revenue row from the orders table inside the
+    caller's write transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection with an open write transaction
+
+    Returns:
+        int: Number of months in the rebuilt rollup
+    """
+    status_sums = ', '.join(f"SUM(delivery_status = '{status}')" for status in STATUS_COLUMNS)
+
+    conn.execute('DELETE FROM monthly_revenue')
+    conn.execute(f'''
+        INSERT INTO monthly_revenue (year, month, order_count, revenue, {', '.join(STATUS_COLUMNS.values())})
+        SELECT COALESCE(CAST(substr(delivery_date_iso, 1, 4) AS INTEGER), 0),
+               COALESCE(CAST(substr(delivery_date_iso, 6, 2) AS INTEGER), 0),
+               COUNT(*), ROUND(COALESCE(SUM(bill_amount), 0), 2), {status_sums}
+        FROM orders
+        GROUP BY 1, 2
+    ''')
+    return conn.execute('SELECT COUNT(*) FROM monthly_revenue').fetchone()[0]
+
+
+def rebuild_monthly_revenue():
+    """
+    Rebuild the monthly_revenue rollup from the orders table, e.g. after rows were
+    changed with triggers disabled or to reconcile suspected drift.
+
+    Returns:
+        dict: Dictionary with success status, message and number of months rebuilt
+    """
+    try:
+        months = db.run_in_transaction(rebuild_rollup)
+        return {'success': True, 'message': f'Rebuilt revenue for {months} months', 'months': months}
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return {'success': False, 'message': 'Failed to rebuild monthly revenue'}
+
+
+if __name__ == '__main__':
+    # python monthrep.py rebuild
+    if sys.argv[1:] != ['rebuild']:
+        sys.exit('Usage: python monthrep.py rebuild')
+    import schema
+    schema.migrate()
+    print(rebuild_monthly_revenue()['message'])
@@ -0,0 +1,437 @@
+# Database schema module
+# Versioned schema migrations for customer_db.sqlite, applied once at app startup.
+# The current version is tracked in the database with PRAGMA user_version.
+
+import db
+
+
+def _migration_001_baseline(cursor):
+    """Create the original tables (no-op for databases created before versioning)."""
+    # Customers table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            cust_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            cust_name TEXT NOT NULL,
+            mobile_no TEXT NOT NULL CHECK(length(mobile_no) = 10 AND mobile_no GLOB '[0-9]*'),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Orders table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id TEXT NOT NULL,
+            customer_name TEXT NOT NULL,
+            pickup_address TEXT NOT NULL,
+            delivery_address TEXT NOT NULL,
+            order_pickup_date TEXT NOT NULL,
+            order_delivery_date TEXT NOT NULL,
+            bill_amount REAL NOT NULL CHECK(bill_amount >= 0),
+            bill_id TEXT UNIQUE NOT NULL,
+            delivery_status TEXT NOT NULL DEFAULT 'Order Placed'
+                CHECK(delivery_status IN ('Order Placed', 'Order Picked', 'In Process', 'Out for Delivery', 'Delivered', 'Cancelled')),
+            cancelled_by TEXT CHECK(cancelled_by IN ('customer', NULL)),
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Combined item and quantity data per order (legacy CSV format)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bill_id TEXT NOT NULL,
+            customer_name TEXT NOT NULL,
+            items_details TEXT NOT NULL
+        )
+    ''')
+
+    # Cart table for temporary cart items
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cart (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL CHECK(quantity > 0),
+            unit_price REAL NOT NULL CHECK(unit_price >= 0),
+            total_price REAL NOT NULL CHECK(total_price >= 0),
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers(cust_id)
+        )
+    ''')
+
+    # Order items table for finalized orders
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bill_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL CHECK(quantity > 0),
+            unit_price REAL NOT NULL CHECK(unit_price >= 0),
+            total_price REAL NOT NULL CHECK(total_price >= 0),
+            FOREIGN KEY (bill_id) REFERENCES orders(bill_id)
+        )
+    ''')
+
+    # Saved customer addresses
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS addresses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id TEXT NOT NULL,
+            address_type TEXT NOT NULL DEFAULT 'Home'
+                CHECK(address_type IN ('Home', 'Work', 'Other')),
+            full_name TEXT NOT NULL,
+            phone TEXT NOT NULL CHECK(length(phone) = 10 AND phone GLOB '[0-9]*'),
+            address_line1 TEXT NOT NULL,
+            address_line2 TEXT,
+            city TEXT NOT NULL DEFAULT 'Mumbai',
+            state TEXT NOT NULL DEFAULT 'Maharashtra',
+            pincode TEXT NOT NULL CHECK(length(pincode) = 6 AND pincode GLOB '[0-9]*'),
+            landmark TEXT,
+            is_default BOOLEAN DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers(cust_id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def _migration_002_order_lookup_indexes(cursor):
+    """Index orders by customer and order items by bill so a customer's orders and items are index lookups."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders(customer_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_bill_id ON order_items(bill_id)')
+
+
+def _migration_003_delivery_date_iso(cursor):
+    """
+    Add a sortable YYYY-MM-DD copy of order_delivery_date (stored as DD-MM-YYYY)
+    as a generated column, and index it per customer for date range filters.
+    """
+    cursor.execute('''
+        ALTER TABLE orders ADD COLUMN delivery_date_iso TEXT GENERATED ALWAYS AS (
+            CASE
+                WHEN length(order_delivery_date) = 10 AND substr(order_delivery_date, 3, 1) = '-' THEN
+                    substr(order_delivery_date, 7, 4) || '-' ||
+                    substr(order_delivery_date, 4, 2) || '-' ||
+                    substr(order_delivery_date, 1, 2)
+                ELSE order_delivery_date
+            END
+        ) VIRTUAL
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_customer_delivery ON orders(customer_id, delivery_date_iso)')
+    # Superseded by the composite index above
+    cursor.execute('DROP INDEX IF EXISTS idx_orders_customer_id')
+
+
+def _migration_004_delivery_date_indexes(cursor):
+    """Index the ISO delivery date for owner listings and reports, overall and per status."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_delivery_date ON orders(delivery_date_iso, bill_id)')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_status_delivery_date
+        ON orders(delivery_status, delivery_date_iso, bill_id)
+    ''')
+
+
+def _migration_005_delivery_slots(cursor):
+    """
+    Add per-day delivery capacity buckets: delivery_slots.booked counts the active
+    orders due on each delivery date and is maintained by triggers on orders.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS delivery_slots (
+            slot_date TEXT PRIMARY KEY,
+            booked INTEGER NOT NULL DEFAULT 0 CHECK(booked >= 0)
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO delivery_slots (slot_date, booked)
+        SELECT delivery_date_iso, COUNT(*) FROM orders
+        WHERE delivery_status NOT IN ('Delivered', 'Cancelled')
+        GROUP BY delivery_date_iso
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_slot_insert
+        AFTER INSERT ON orders
+        WHEN NEW.delivery_status NOT IN ('Delivered', 'Cancelled')
+        BEGIN
+            INSERT INTO delivery_slots (slot_date, booked) VALUES (NEW.delivery_date_iso, 1)
+            ON CONFLICT(slot_date) DO UPDATE SET booked = booked + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_slot_delete
+        AFTER DELETE ON orders
+        WHEN OLD.delivery_status NOT IN ('Delivered', 'Cancelled')
+        BEGIN
+            UPDATE delivery_slots SET booked = booked - 1 WHERE slot_date = OLD.delivery_date_iso;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_slot_update
+        AFTER UPDATE OF delivery_status, order_delivery_date ON orders
+        BEGIN
+            UPDATE delivery_slots SET booked = booked - 1
+            WHERE slot_date = OLD.delivery_date_iso
+              AND OLD.delivery_status NOT IN ('Delivered', 'Cancelled');
+            INSERT INTO delivery_slots (slot_date, booked)
+            SELECT NEW.delivery_date_iso, 1
+            WHERE NEW.delivery_status NOT IN ('Delivered', 'Cancelled')
+            ON CONFLICT(slot_date) DO UPDATE SET booked = booked + 1;
+        END
+    ''')
+
+
+def _migration_006_bill_id_sequence(cursor):
+    """Add a sequence table for bill IDs, starting after the highest existing B<number> bill ID."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS id_sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO id_sequences (name, value)
+        SELECT 'bill_id', COALESCE(MAX(CAST(substr(bill_id, 2) AS INTEGER)), 0)
+        FROM orders
+        WHERE bill_id GLOB 'B[0-9]*'
+    ''')
+
+
+def _monthly_revenue_delta(row, sign):
+    """Build the UPSERT that adds (sign '+') or removes (sign '-') one order row from monthly_revenue."""
+    statuses = [('placed_orders', 'Order Placed'), ('picked_orders', 'Order Picked'),
+                ('in_process_orders', 'In Process'), ('out_for_delivery_orders', 'Out for Delivery'),
+                ('delivered_orders', 'Delivered'), ('cancelled_orders', 'Cancelled')]
+    columns = ', '.join(column for column, _ in statuses)
+    values = ', '.join(f"{sign}({row}.delivery_status = '{status}')" for _, status in statuses)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column, _ in statuses)
+    return f'''
+            INSERT INTO monthly_revenue (year, month, order_count, revenue, {columns})
+            VALUES (COALESCE(CAST(substr({row}.delivery_date_iso, 1, 4) AS INTEGER), 0),
+                    COALESCE(CAST(substr({row}.delivery_date_iso, 6, 2) AS INTEGER), 0),
+                    {sign}1, {sign}COALESCE({row}.bill_amount, 0), {values})
+            ON CONFLICT(year, month) DO UPDATE SET
+                order_count = order_count + excluded.order_count,
+                revenue = ROUND(revenue + excluded.revenue, 2),
+                {updates};
+    '''
+
+
+def _migration_007_monthly_revenue(cursor):
+    """
+    Add the monthly_revenue rollup: order count, revenue and per-status counts per
+    delivery month, kept up to date by triggers on orders. Orders whose delivery
+    date cannot be parsed are counted under year 0, month 0.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_revenue (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            placed_orders INTEGER NOT NULL DEFAULT 0,
+            picked_orders INTEGER NOT NULL DEFAULT 0,
+            in_process_orders INTEGER NOT NULL DEFAULT 0,
+            out_for_delivery_orders INTEGER NOT NULL DEFAULT 0,
+            delivered_orders INTEGER NOT NULL DEFAULT 0,
+            cancelled_orders INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (year, month)
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO monthly_revenue
+        SELECT COALESCE(CAST(substr(delivery_date_iso, 1, 4) AS INTEGER), 0),
+               COALESCE(CAST(substr(delivery_date_iso, 6, 2) AS INTEGER), 0),
+               COUNT(*), ROUND(COALESCE(SUM(bill_amount), 0), 2),
+               SUM(delivery_status = 'Order Placed'), SUM(delivery_status = 'Order Picked'),
+               SUM(delivery_status = 'In Process'), SUM(delivery_status = 'Out for Delivery'),
+               SUM(delivery_status = 'Delivered'), SUM(delivery_status = 'Cancelled')
+        FROM orders
+        GROUP BY 1, 2
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_revenue_insert
+        AFTER INSERT ON orders
+        BEGIN
+            {_monthly_revenue_delta('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_revenue_delete
+        AFTER DELETE ON orders
+        BEGIN
+            {_monthly_revenue_delta('OLD', '-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_revenue_update
+        AFTER UPDATE OF delivery_status, bill_amount, order_delivery_date ON orders
+        BEGIN
+            {_monthly_revenue_delta('OLD', '-')}
+            {_monthly_revenue_delta('NEW', '+')}
+        END
+    ''')
+
+
+def _migration_008_import_state(cursor):
+    """
+    Add bookkeeping tables for the legacy CSV importer: per-file progress so an
+    interrupted import can resume, the definitions of indexes and triggers
+    dropped for the duration of a bulk load, the bills whose orders the importer
+    inserted (the only ones it may load items for), and the bills whose existing
+    items the current items import has already replaced.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_progress (
+            source TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            rows_read INTEGER NOT NULL DEFAULT 0,
+            rows_rejected INTEGER NOT NULL DEFAULT 0,
+            records_loaded INTEGER NOT NULL DEFAULT 0,
+            records_skipped INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_deferred_objects (
+            name TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            sql TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_order_bills (
+            bill_id TEXT PRIMARY KEY
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_item_bills (
+            bill_id TEXT PRIMARY KEY
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migration_009_customer_status_index(cursor):
+    """
+    Index orders by (customer_id, delivery_status, bill_amount) so per-status counts
+    and spend for one customer are read from the index alone, already grouped.
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_customer_status
+        ON orders(customer_id, delivery_status, bill_amount)
+    ''')
+
+
+def _migration_010_cart_address_indexes(cursor):
+    """
+    Index the per-customer lookups of cart (by item) and addresses (default first).
+    order_items(bill_id), orders(customer_id) and orders(delivery_status) are
+    already served by the indexes of migrations 2, 3, 4 and 9.
+    """
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cart_customer_item ON cart(customer_id, item_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_addresses_customer_default ON addresses(customer_id, is_default)')
+
+
+def _migration_011_unique_cart_item(cursor):
+    """
+    Make (customer_id, item_name) the unique key of the cart, so add_to_cart can
+    upsert in one statement. Rows duplicated by concurrent adds are merged first:
+    the oldest row keeps the summed quantity and the latest added_at.
+    """
+    cursor.execute('''
+        UPDATE cart
+        SET quantity = (SELECT SUM(dup.quantity) FROM cart dup
+                        WHERE dup.customer_id = cart.customer_id AND dup.item_name = cart.item_name),
+            added_at = (SELECT MAX(dup.added_at) FROM cart dup
+                        WHERE dup.customer_id = cart.customer_id AND dup.item_name = cart.item_name)
+        WHERE id IN (SELECT MIN(id) FROM cart GROUP BY customer_id, item_name HAVING COUNT(*) > 1)
+    ''')
+    cursor.execute('UPDATE cart SET total_price = unit_price * quantity')
+    cursor.execute('''
+        DELETE FROM cart
+        WHERE id NOT IN (SELECT MIN(id) FROM cart GROUP BY customer_id, item_name)
+    ''')
+
+    # The unique index also serves every lookup the plain one did
+    cursor.execute('DROP INDEX IF EXISTS idx_cart_customer_item')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_cart_customer_item ON cart(customer_id, item_name)')
+
+
+# Ordered list of (version, description, function). Append new migrations at the end;
+# never edit or reorder one that has already shipped.
+MIGRATIONS = [
+    (1, 'Create baseline tables', _migration_001_baseline),
+    (2, 'Index orders by customer_id and order_items by bill_id', _migration_002_order_lookup_indexes),
+    (3, 'Add orders.delivery_date_iso and index it per customer', _migration_003_delivery_date_iso),
+    (4, 'Index orders by delivery date, overall and per status', _migration_004_delivery_date_indexes),
+    (5, 'Add trigger-maintained delivery slot buckets', _migration_005_delivery_slots),
+    (6, 'Add bill ID sequence', _migration_006_bill_id_sequence),
+    (7, 'Add trigger-maintained monthly revenue rollup', _migration_007_monthly_revenue),
+    (8, 'Add legacy CSV import bookkeeping tables', _migration_008_import_state),
+    (9, 'Index orders by customer and status for customer statistics', _migration_009_customer_status_index),
+    (10, 'Index cart by customer and item, addresses by customer and default flag', _migration_010_cart_address_indexes),
+    (11, 'Make (customer_id, item_name) the unique cart key, merging duplicate rows', _migration_011_unique_cart_item),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """
+    Get the schema version recorded in the database.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Current schema version (0 for an unversioned database)
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate():
+    """
+    Apply all pending migrations in order. Each migration runs in its own
+    write transaction together with the user_version bump, so a failed
+    migration leaves the database at the previous version.
+
+    Returns:
+        int: Schema version after migrating
+    """
+    conn = db.get_connection()
+
+    try:
+        for version, description, apply_migration in MIGRATIONS:
+            if version <= get_schema_version(conn):
+                continue
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have migrated while we waited for the lock
+                if version <= get_schema_version(conn):
+                    conn.rollback()
+                    continue
+                apply_migration(conn.cursor())
+                conn.execute(f'PRAGMA user_version = {version:d}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            print(f"Applied schema migration {version}: {description}")
+
+        return get_schema_version(conn)
+
+    finally:
+        db.release_connection(conn)
+
+
+if __name__ == '__main__':
+    print(f"Schema version: {migrate()}")
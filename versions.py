@@ -0,0 +1,65 @@
+# Data version module
+# In-process counters bumped by every write, used to build ETags for conditional GETs
+
+import hashlib
+import os
+import threading
+import time
+
+# An ETag also changes when this many seconds have passed, bounding how long a client can
+# be told "not modified" after a write made by another process (an import, a second worker)
+ETAG_MAX_AGE = 300
+
+# Differs for every process, so ETags handed out before a restart never match
+_BOOT_ID = os.urandom(8).hex()
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def bump(*scopes):
+    """
+    Record that the data of each scope changed. Call after committing the write.
+
+    Args:
+        *scopes: Scope keys, e.g. 'orders' (all orders) or ('orders', customer_id)
+    """
+    with _lock:
+        for scope in scopes:
+            _versions[scope] = _versions.get(scope, 0) + 1
+
+
+def orders_changed(customer_id):
+    """Bump the global order version and the order version of one customer."""
+    bump('orders', ('orders', customer_id))
+
+
+def cart_changed(customer_id):
+    """Bump the cart version of one customer."""
+    bump(('cart', customer_id))
+
+
+def addresses_changed(customer_id):
+    """Bump the saved-address version of one customer."""
+    bump(('addresses', customer_id))
+
+
+def make_etag(*scopes, variant=''):
+    """
+    Build an ETag from the current versions of some scopes, without reading the database.
+
+    Compute it before running the queries of a response: a write that commits
+    in between then only makes the ETag conservative, never wrong.
+
+    Args:
+        *scopes: Scope keys the response depends on (see bump())
+        variant: Anything else the body depends on (e.g. the response format or query filters)
+
+    Returns:
+        str: ETag value (unquoted)
+    """
+    with _lock:
+        versions = [_versions.get(scope, 0) for scope in scopes]
+    window = int(time.time() // ETAG_MAX_AGE)
+    key = repr((_BOOT_ID, window, scopes, versions, variant))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]